@@ -172,3 +172,23 @@ class Account:
                 The response from the API as a dictionary.
         """
         return self.api_requests.request(method="GET", endpoint=f"accounts/{user_id}")
+
+
+class AsyncAccount(Account):
+    """
+        Async counterpart of Account, built on an AsyncApiRequests instance.
+
+        Every method is a coroutine that takes the same parameters and returns the same data as its Account
+        equivalent.
+    """
+    async def create(self, data: AccountData) -> AccountCreateResponse:
+        return await super().create(data)
+
+    async def update(self, account_id: str, data: AccountUpdateData) -> AccountCreateResponse:
+        return await super().update(account_id, data)
+
+    async def get_by_id(self, account_id: str) -> AccountCreateResponse:
+        return await super().get_by_id(account_id)
+
+    async def get_by_user(self, user_id: str) -> AccountCreateResponse:
+        return await super().get_by_user(user_id)
@@ -1,6 +1,48 @@
-import requests as re
+import contextvars
+import hashlib
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
-from killb.exceptions import KillBApiError, AuthenticationError
+from killb.exceptions import KillBApiError, AuthenticationError, RateLimitError, DeadlineExceededError
+from killb.single_flight import SingleFlight
+from killb.deadline import Deadline, current_deadline, detached_context
+from killb.retry import parse_retry_after
+from killb.codec import JsonCodec
+from killb.compression import TransferStats, CompressionStats, accept_encoding, compress_body
+from killb.endpoints import endpoint_template
+
+
+class _Call:
+    """
+        The parts of a request that stay the same across its attempts.
+    """
+    __slots__ = ("method", "endpoint", "headers", "kwargs", "timeout", "request_bytes", "request_wire_bytes")
+
+    def __init__(self, method, endpoint, headers, kwargs, timeout):
+        self.method = method
+        self.endpoint = endpoint
+        self.headers = headers
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.request_bytes = 0
+        self.request_wire_bytes = 0
+
+
+class _Attempt:
+    """
+        The state of one attempt of a call: its own copy of the headers, what its response said about caching and
+        its result. A hedged call runs two attempts at once, so they must not share it.
+    """
+    __slots__ = ("headers", "response_bytes", "etag", "last_modified", "not_modified", "result")
+
+    def __init__(self, headers):
+        self.headers = dict(headers)
+        self.response_bytes = 0
+        self.etag = None
+        self.last_modified = None
+        self.not_modified = False
+        self.result = None
 
 
 class ApiRequests:
@@ -17,6 +59,9 @@ class ApiRequests:
             The password for authentication.
         api_key : str, optional
             An optional API key for authentication.
+        transport : RequestsTransport or HttpxTransport
+            The pooled transport reused by every request made by this instance. It is built, and its HTTP library
+            imported, on first use.
 
         Methods:
         -------
@@ -26,8 +71,20 @@ class ApiRequests:
             Checks if the access token has expired.
         request(method, endpoint, **kwargs) -> dict:
             Makes a request to the API and handles authentication.
+        refresh_token():
+            Re-authenticates once for every thread that found the token expired at the same time.
+        pool_stats() -> dict:
+            Returns connection reuse statistics for the transport's pool.
+        close():
+            Closes the transport, every pooled connection and the background token refresher.
     """
-    def __init__(self, environment: str, email: str, password: str, api_key: str = None):
+    def __init__(self, environment: str, email: str, password: str, api_key: str = None, pool_size: int = 10,
+                 max_connections_per_host: int = 10, keep_alive: bool = True, pool_block: bool = False,
+                 auto_refresh: bool = False, refresh_margin: float = 60, token_store=None, retry_policy=None,
+                 rate_limiter=None, circuit_breaker=None, connect_timeout: float = 5, read_timeout: float = 30,
+                 http2: bool = False, compress_requests: bool = False, compress_min_size: int = 1024,
+                 on_transfer=None, codec=None, transport=None, base_url: str = None, hedge_policy=None,
+                 coalesce_reads: bool = False, response_cache=None, simulation_cache=None, mirror=None):
         """
             Constructs all the necessary attributes for the APIRequests object.
 
@@ -41,17 +98,176 @@ class ApiRequests:
                 The password for authentication.
             api_key : str, optional
                 An API key for authentication.
+            pool_size : int, optional
+                The number of per-host connection pools to keep (default 10).
+            max_connections_per_host : int, optional
+                The maximum number of connections kept open to a single host (default 10).
+            keep_alive : bool, optional
+                Whether connections are kept open between requests (default True).
+            pool_block : bool, optional
+                Whether to block when every connection to a host is in use instead of opening a
+                throwaway connection (default False).
+            auto_refresh : bool, optional
+                Whether a background thread renews the token `refresh_margin` seconds before it expires, so that
+                requests never wait for a login (default False).
+            refresh_margin : float, optional
+                How many seconds before `token_expiry` the background refresh runs (default 60).
+            token_store : TokenStore, optional
+                A store shared with other clients, e.g. a FileTokenStore shared by every worker process on the host.
+                Refreshes take the store's lock and reuse a token another client already saved, so a fleet of
+                workers logs in once per expiry instead of once per worker.
+            retry_policy : RetryPolicy, optional
+                When set, failed requests are retried with exponential backoff and jitter, and POST/PATCH requests
+                carry an idempotency key so that retrying them is safe. By default nothing is retried.
+            rate_limiter : RateLimiter, optional
+                When set, every request first takes a token from the limiter's bucket for this credential and
+                endpoint template, and the limiter adapts its rate to the 429 responses it sees.
+            circuit_breaker : CircuitBreaker, optional
+                When set, calls to an endpoint template whose recent calls mostly failed or were slow raise
+                CircuitOpenError immediately instead of reaching the network. Only the network round trip of each
+                attempt is timed and recorded: token refreshes, rate limiter waits and deadline errors raised
+                before the request is sent are not.
+            connect_timeout : float, optional
+                The default number of seconds allowed to open a connection (default 5).
+            read_timeout : float, optional
+                The default number of seconds allowed between bytes of the response (default 30).
+            http2 : bool, optional
+                Whether to multiplex requests over HTTP/2 connections with httpx instead of using requests over
+                HTTP/1.1 (default False). Requires `pip install killb-sdk-python[http2]`; falls back to HTTP/1.1
+                when the server or the environment does not support it.
+            compress_requests : bool, optional
+                Whether JSON request bodies of at least `compress_min_size` bytes are sent gzipped (default False).
+                Only enable it when the server accepts `Content-Encoding: gzip` requests.
+            compress_min_size : int, optional
+                The smallest request body, in bytes, that is compressed (default 1024).
+            on_transfer : callable, optional
+                Called with a TransferStats for every response, with the bytes sent and received before and after
+                (de)compression. Responses are always requested with gzip, deflate and, when available, brotli.
+            codec : JsonCodec, optional
+                Encodes request bodies and decodes responses (default: the standard library's json module). Pass an
+                OrjsonCodec, or `killb.codec.best_codec()`, for faster JSON handling. Enum members in request data
+                are sent as their values with every codec.
+            transport : Transport, optional
+                Sends every request instead of the pooled HTTP transport, e.g. a MemoryTransport or a
+                CassetteTransport to run without the gateway. `pool_size`, `keep_alive` and `http2` are then unused.
+            base_url : str, optional
+                Overrides the environment's base URL, e.g. to point the client at a local mock server.
+            hedge_policy : HedgePolicy, optional
+                When set, reads that are slower than usual are sent a second time and the first response is used.
+                The first attempt runs on a pool of `max_connections_per_host` threads, so that the caller can
+                return as soon as a hedge wins, and the hedge on a second pool of the same size. A read runs on the
+                caller's thread, without a hedge, while the first pool is busy, and a hedge is skipped while the
+                second one is.
+            coalesce_reads : bool, optional
+                Whether identical GETs in flight at the same time, from any thread, share one network call
+                (default False). Every caller then receives the same parsed object, which must not be mutated. The
+                shared call uses the default timeouts and no deadline; each caller waits for it within its own
+                deadline. Calls with their own `timeout` are not shared.
+            response_cache : ResponseCache, optional
+                When set, GET responses of the endpoints it has a TTL for are served from memory until they expire
+                or a mutation sent through this client invalidates them. Expired responses with an ETag or
+                Last-Modified header are revalidated with a conditional request.
+            simulation_cache : SimulationCache, optional
+                When set, `Quotation.simulate` results are cached per corridor and amount bucket and refreshed in
+                the background.
+            mirror : LocalMirror, optional
+                When set, the users, accounts, ramps and transactions returned by every call are stored in the
+                mirror's SQLite database for local lookups, by a background thread of the mirror.
         """
         self.environment = environment
         self.api_key = api_key
         self.access_token = None
-        self.base_url = ''
+        self.base_url = base_url or ''
+        self._base_url_override = base_url
         self.email = email
         self.password = password
         self.expires_at = 0
         self.token_expiry = None
         self.headers = {"x-api-key": self.api_key,
-                        "Authorization": f"Bearer {self.access_token}" if self.access_token else None}
+                        "Authorization": f"Bearer {self.access_token}" if self.access_token else None,
+                        "Accept-Encoding": accept_encoding()}
+        self.pool_size = pool_size
+        self.max_connections_per_host = max_connections_per_host
+        self.keep_alive = keep_alive
+        self.pool_block = pool_block
+        self.auto_refresh = auto_refresh
+        self.refresh_margin = refresh_margin
+        self.token_store = token_store
+        self._credential_key = None
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.hedge_policy = hedge_policy
+        self._hedge_executors = {}
+        # Attempts in flight on each pool; a pool only takes work while one of its threads is idle.
+        self._hedge_workers = max_connections_per_host
+        self._hedge_slots = {"primary": 0, "hedge": 0}
+        self._hedge_lock = threading.Lock()
+        self.coalesce_reads = coalesce_reads
+        self._read_flight = SingleFlight()
+        self.response_cache = response_cache
+        self.simulation_cache = simulation_cache
+        self.mirror = mirror
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2
+        self.compress_requests = compress_requests
+        self.compress_min_size = compress_min_size
+        self.on_transfer = on_transfer
+        self.codec = codec if codec is not None else JsonCodec()
+        self._compression_stats = CompressionStats()
+        self._refresh_flight = SingleFlight()
+        self._refresher = None
+        self._refresh_at = None
+        self._closed = threading.Event()
+        self._transport = transport
+        self._transport_lock = threading.Lock()
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    self._transport = self._build_transport()
+        return self._transport
+
+    def _build_transport(self):
+        """
+            Builds the pooled transport used for every request.
+
+            Returns:
+            -------
+            RequestsTransport or HttpxTransport
+                An HTTP/2-capable httpx transport when `http2` is set, a requests transport otherwise.
+        """
+        from killb.transport import RequestsTransport, HttpxTransport
+
+        if self.http2:
+            return HttpxTransport(max_connections_per_host=self.max_connections_per_host, keep_alive=self.keep_alive,
+                                  http2=True)
+        return RequestsTransport(pool_size=self.pool_size, max_connections_per_host=self.max_connections_per_host,
+                                 keep_alive=self.keep_alive, pool_block=self.pool_block)
+
+    def pool_stats(self):
+        """
+            Returns connection statistics for the transport's connection pool.
+
+            Returns:
+            -------
+            dict
+                The number of requests sent and connections opened, reused or open, depending on the transport.
+        """
+        return self.transport.pool_stats()
+
+    def close(self):
+        """
+            Closes the transport, every pooled connection and the background token refresher.
+        """
+        self._closed.set()
+        for executor in list(self._hedge_executors.values()):
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self._transport is not None:
+            self._transport.close()
 
     def get_base_url(self):
         """
@@ -62,6 +278,8 @@ class ApiRequests:
             str
                 Returns the base URL of the API.
         """
+        if self._base_url_override:
+            return self._base_url_override
         if self.environment == 'SANDBOX':
             self.base_url = 'https://teste-94u93qnn.uc.gateway.dev/api/v2'
             return self.base_url
@@ -83,7 +301,7 @@ class ApiRequests:
             return True
         return datetime.now() > self.token_expiry
 
-    def request(self, method, endpoint, **kwargs):
+    def request(self, method, endpoint, timeout=None, deadline=None, **kwargs):
         """
             Makes a request to the API and handles authentication.
 
@@ -93,6 +311,11 @@ class ApiRequests:
                 The HTTP method (e.g., 'GET', 'POST', etc.).
             endpoint : str
                 The API endpoint.
+            timeout : float or tuple, optional
+                Overrides the default timeouts for this call, either as one number or as a (connect, read) tuple.
+            deadline : float or Deadline, optional
+                A time budget in seconds for this call, including token refreshes and retries. Calls made inside an
+                active Deadline block are bounded by it as well.
             **kwargs :
                 Additional arguments to pass to the requests function.
 
@@ -101,37 +324,513 @@ class ApiRequests:
             dict
                 The response from the API as a dictionary.
         """
+        if deadline is None:
+            return self._request(method, endpoint, timeout, **kwargs)
+        with deadline if isinstance(deadline, Deadline) else Deadline(deadline):
+            return self._request(method, endpoint, timeout, **kwargs)
+
+    def _prepare(self, method, endpoint, timeout, kwargs):
+        """
+            Builds the parts of a call that every attempt reuses: idempotency key, encoded body and timeouts.
+        """
+        call = _Call(method, endpoint, self._idempotency_headers(method), kwargs, timeout)
+        if "json" in kwargs:
+            body = self.codec.encode(kwargs.pop("json"))
+            call.headers["Content-Type"] = self.codec.content_type
+            call.request_bytes = len(body)
+            if self.compress_requests:
+                body, content_encoding = compress_body(body, self.compress_min_size)
+                if content_encoding:
+                    call.headers["Content-Encoding"] = content_encoding
+            call.request_wire_bytes = len(body)
+            kwargs["content"] = body
+        elif self._caches(method, endpoint, kwargs):
+            call.headers.update(self.response_cache.conditional_headers(self.token_store_key(), endpoint))
+        return call
+
+    def _read_key(self, method, endpoint):
+        return method.upper(), f"{self.get_base_url()}/{endpoint}", self.token_store_key()
+
+    def _coalesces(self, method, kwargs):
+        return self.coalesce_reads and method.upper() == "GET" and not kwargs
+
+    def _caches(self, method, endpoint, kwargs):
+        return (self.response_cache is not None and method.upper() == "GET" and not kwargs
+                and bool(self.response_cache.ttl(endpoint)))
+
+    def _cached(self, method, endpoint, kwargs):
+        if not self._caches(method, endpoint, kwargs):
+            return None
+        return self.response_cache.get(self.token_store_key(), endpoint)
+
+    def _remember(self, call, attempt):
+        """
+            Caches and mirrors the result of the attempt that answered the call, and returns it.
+        """
+        result = attempt.result
+        if not attempt.not_modified and self._caches(call.method, call.endpoint, call.kwargs):
+            self.response_cache.put(self.token_store_key(), call.endpoint, result, attempt.response_bytes,
+                                    attempt.etag, attempt.last_modified)
+        if self.mirror is not None:
+            self.mirror.observe(call.method, call.endpoint, result)
+        return result
+
+    def _revalidated(self, call, attempt):
+        """
+            Returns the cached object a 304 response confirmed, or None when it was evicted in the meantime, in
+            which case the conditional headers are dropped so that the attempt can be resent unconditionally.
+        """
+        value = None
+        if self.response_cache is not None:
+            value = self.response_cache.revalidate(self.token_store_key(), call.endpoint, attempt.etag,
+                                                   attempt.last_modified)
+        if value is None:
+            attempt.headers.pop("If-None-Match", None)
+            attempt.headers.pop("If-Modified-Since", None)
+        attempt.not_modified = value is not None
+        return value
+
+    def _invalidate(self, call):
+        # Mutations invalidate even when they fail: a timed-out PATCH may still have been applied.
+        if self.response_cache is not None and call.method.upper() != "GET":
+            self.response_cache.invalidate(call.endpoint, call.method)
+
+    def _request(self, method, endpoint, timeout, **kwargs):
+        cached = self._cached(method, endpoint, kwargs)
+        if cached is not None:
+            return cached
+        if timeout is not None or not self._coalesces(method, kwargs):
+            return self._retrying_request(method, endpoint, timeout, **kwargs)
+        # The shared call runs without the deadline of the caller that starts it, bounded by the default timeouts,
+        # and each caller with a deadline only waits for it as long as its own budget allows.
+        deadline = current_deadline()
+        try:
+            return self._read_flight.do(self._read_key(method, endpoint), detached_context().run,
+                                        self._retrying_request, method, endpoint, None,
+                                        wait_timeout=deadline.remaining() if deadline is not None else None,
+                                        background=deadline is not None)
+        except TimeoutError:
+            raise DeadlineExceededError("Deadline exceeded while waiting for an identical request") from None
+
+    def _retrying_request(self, method, endpoint, timeout, **kwargs):
+        call = self._prepare(method, endpoint, timeout, kwargs)
+        attempt = 0
+        try:
+            while True:
+                try:
+                    return self._remember(call, self._send(call))
+                except KillBApiError as error:
+                    delay = self._retry_delay(attempt, call, error)
+                    if delay is None:
+                        self._raise_if_deadline_exceeded(error)
+                        raise
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            self._invalidate(call)
+
+    def _send(self, call):
+        """
+            Sends an attempt, hedged when the hedge policy applies to it.
+        """
+        delay = self.hedge_policy.delay(call.method, call.endpoint) if self.hedge_policy is not None else None
+        if delay is None:
+            return self._send_attempt(call)
+        return self._send_hedged(call, delay)
+
+    def _hedge_pool(self, kind):
+        executor = self._hedge_executors.get(kind)
+        if executor is None:
+            with self._transport_lock:
+                executor = self._hedge_executors.get(kind)
+                if executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    executor = self._hedge_executors[kind] = ThreadPoolExecutor(
+                        max_workers=self._hedge_workers, thread_name_prefix=f"killb-{kind}")
+        return executor
+
+    def _timed_attempt(self, call):
+        started = time.monotonic()
+        attempt = self._send_attempt(call)
+        self.hedge_policy.record_latency(call.endpoint, time.monotonic() - started)
+        return attempt
+
+    def _submit_attempt(self, kind, call):
+        """
+            Runs an attempt on an idle thread of the `primary` or `hedge` pool, or returns None when none is idle:
+            queued behind other attempts, it would only start late.
+        """
+        with self._hedge_lock:
+            if self._hedge_slots[kind] >= self._hedge_workers:
+                return None
+            self._hedge_slots[kind] += 1
+        try:
+            future = self._hedge_pool(kind).submit(contextvars.copy_context().run, self._timed_attempt, call)
+        except RuntimeError:
+            # The pool was shut down by close().
+            future = None
+        if future is None:
+            self._release_slot(kind)
+        else:
+            future.add_done_callback(lambda _: self._release_slot(kind))
+        return future
+
+    def _release_slot(self, kind):
+        with self._hedge_lock:
+            self._hedge_slots[kind] -= 1
+
+    def _send_hedged(self, call, delay):
+        """
+            Sends the attempt and, if it has not answered `delay` seconds after it started, races a duplicate on
+            the hedge pool.
+
+            Threads cannot be interrupted, so the losing attempt is left to finish and its response is discarded.
+        """
+        from concurrent.futures import wait, FIRST_COMPLETED, TimeoutError as FutureTimeout
+
+        primary = self._submit_attempt("primary", call)
+        if primary is None:
+            return self._timed_attempt(call)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+        if not self.hedge_policy.acquire(call.endpoint):
+            return primary.result()
+        hedge = self._submit_attempt("hedge", call)
+        if hedge is None:
+            return primary.result()
+
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.hedge_policy.record_hedge(call.endpoint, won=future is hedge)
+                    return future.result()
+                error = error or future.exception()
+        self.hedge_policy.record_hedge(call.endpoint, won=False)
+        raise error
+
+    def _send_attempt(self, call, attempt=None):
+        """
+            Sends a single attempt of a request, refreshing the token first if needed, and returns the _Attempt
+            holding its result.
+        """
+        attempt = attempt or _Attempt(call.headers)
         if self.token_expired():
             self.refresh_token()
+        if self.rate_limiter is not None:
+            time.sleep(self._rate_limit_wait(call.endpoint))
+        self._check_deadline()
+
+        url = f"{self.get_base_url()}/{call.endpoint}"
+        headers = self._request_headers(attempt.headers)
+        timeout = self._timeout(call.timeout)
+        # The circuit breaker only sees the network: token refreshes and rate limiter waits happen before it.
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call(call.endpoint)
+        started = time.monotonic()
+        try:
+            response = self.transport.send(call.method, url, headers=headers, timeout=timeout, **call.kwargs)
+        except BaseException as error:
+            self._record_outcome(call, started, error)
+            raise
+        duration = time.monotonic() - started
+        self._observe(call, attempt, response)
+        if response.status_code == 304:
+            self._record_outcome(call, started, duration=duration)
+            value = self._revalidated(call, attempt)
+            if value is None:
+                return self._send_attempt(call, attempt)
+            attempt.result = value
+            return attempt
+        attempt.result = self._handled_response(call, response, duration)
+        return attempt
 
-        url = f"{self.base_url}/{endpoint}"
-        response = re.request(method=method, url=url, headers=self.headers, **kwargs)
+    def _handled_response(self, call, response, duration):
+        """
+            Parses a response and records it with the circuit breaker: as a failure when it is a 5xx error.
+        """
+        try:
+            result = self._handle_response(response)
+        except BaseException as error:
+            self._record_outcome(call, duration=duration, error=error)
+            raise
+        self._record_outcome(call, duration=duration)
+        return result
+
+    def _record_outcome(self, call, started=None, error=None, duration=None):
+        if self.circuit_breaker is not None:
+            if duration is None:
+                duration = time.monotonic() - started
+            self.circuit_breaker.record(call.endpoint, duration, error)
+
+    def _observe(self, call, attempt, response):
+        """
+            Feeds a response to the components that adapt to the API's behaviour or measure it.
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.observe(self.token_store_key(), call.endpoint, response.status_code,
+                                      parse_retry_after(response.headers.get("Retry-After")))
+
+        attempt.response_bytes = len(response.content)
+        attempt.etag = response.headers.get("ETag")
+        attempt.last_modified = response.headers.get("Last-Modified")
+        transfer = TransferStats(call.method, call.endpoint, response.headers.get("Content-Encoding"),
+                                 response.wire_size, attempt.response_bytes, call.request_wire_bytes,
+                                 call.request_bytes)
+        self._compression_stats.record(endpoint_template(call.endpoint), transfer)
+        if self.on_transfer is not None:
+            self.on_transfer(transfer)
+
+    def transfer_stats(self):
+        """
+            Returns the bytes transferred per endpoint template, before and after (de)compression.
+
+            Returns:
+            -------
+            dict
+                Per template: calls, response bytes on the wire and decompressed, request bytes on the wire and
+                uncompressed, and the response compression ratio.
+        """
+        return self._compression_stats.as_dict()
 
+    def _rate_limit_wait(self, endpoint):
+        """
+            Reserves a rate limiter slot and returns how long to wait for it, failing fast when the wait would
+            outlast the active deadline.
+        """
+        wait = self.rate_limiter.reserve(self.token_store_key(), endpoint)
+        deadline = current_deadline()
+        if deadline is not None and wait > deadline.remaining():
+            raise DeadlineExceededError("Deadline exceeded while waiting for the rate limiter")
+        return wait
+
+    def _raise_if_deadline_exceeded(self, error):
+        deadline = current_deadline()
+        if deadline is not None and deadline.expired() and not isinstance(error, DeadlineExceededError):
+            raise DeadlineExceededError(f"Deadline exceeded: {error}") from error
+
+    def _check_deadline(self):
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check()
+
+    def _timeout(self, timeout=None):
+        """
+            Resolves the (connect, read) timeouts of an attempt, bounded by the active deadline.
+        """
+        if timeout is None:
+            connect, read = self.connect_timeout, self.read_timeout
+        elif isinstance(timeout, (tuple, list)):
+            connect, read = timeout
+        else:
+            connect = read = timeout
+
+        deadline = current_deadline()
+        if deadline is not None:
+            remaining = max(deadline.remaining(), 0.001)
+            connect, read = min(connect, remaining), min(read, remaining)
+        return connect, read
+
+    def _request_headers(self, extra_headers=None):
+        headers = {key: value for key, value in self.headers.items() if value is not None}
+        if extra_headers:
+            headers.update(extra_headers)
+        return headers
+
+    def _idempotency_headers(self, method):
+        if self.retry_policy is None or not self.retry_policy.needs_idempotency_key(method):
+            return {}
+        return {self.retry_policy.idempotency_header: str(uuid.uuid4())}
+
+    def _retry_delay(self, attempt, call, error):
+        if self.retry_policy is None:
+            return None
+        idempotent = self.retry_policy.idempotency_header in call.headers
+        delay = self.retry_policy.next_delay(attempt, call.method, error, idempotent)
+        deadline = current_deadline()
+        if delay is not None and deadline is not None and delay >= deadline.remaining():
+            return None
+        return delay
+
+    def _handle_response(self, response):
+        """
+            Raises the matching exception for an error response, or parses a successful one.
+
+            Parameters:
+            ----------
+            response :
+                The HTTP response returned by the transport.
+
+            Returns:
+            -------
+            dict
+                The response from the API as a dictionary.
+        """
         if response.status_code == 401:
-            raise AuthenticationError("Authentication Failed")
-        elif not response.ok:
-            raise KillBApiError(f"Error: {response.status_code} - {response.text}")
-        
-        return response.json()
+            raise AuthenticationError("Authentication Failed", status_code=401, headers=response.headers)
+        elif response.status_code == 429:
+            raise RateLimitError(f"Error: {response.status_code} - {response.text}", status_code=429,
+                                 headers=response.headers)
+        elif response.status_code >= 400:
+            raise KillBApiError(f"Error: {response.status_code} - {response.text}", status_code=response.status_code,
+                                headers=response.headers)
+
+        return self.codec.decode(response.content)
+
+    def _auth_headers(self):
+        return {"x-api-key": self.api_key} if self.api_key else None
+
+    def _login_payload(self):
+        return {"email": self.email, "password": self.password}
+
+    def _store_token(self, response_auth):
+        """
+            Stores the access token and its expiry from a login response.
+
+            Parameters:
+            ----------
+            response_auth :
+                The HTTP response returned by the login endpoint.
+        """
+        if response_auth.status_code >= 400:
+            raise AuthenticationError(f"Authentication Failed: {response_auth.text}")
+
+        response = self.codec.decode(response_auth.content)
+        self._set_token(response["accessToken"], datetime.now() + timedelta(seconds=response["expiresIn"]))
+
+    def _set_token(self, access_token, token_expiry):
+        """
+            Publishes a new access token.
+
+            The headers dict is replaced rather than mutated, so requests running on other threads keep sending a
+            consistent snapshot.
+
+            Parameters:
+            ----------
+            access_token : str
+                The new access token.
+            token_expiry : datetime
+                When the access token expires.
+        """
+        lifetime = (token_expiry - datetime.now()).total_seconds()
+        self.access_token = access_token
+        self.token_expiry = token_expiry
+        self._refresh_at = token_expiry - timedelta(seconds=min(self.refresh_margin, max(lifetime, 0) / 2))
+        self.headers = {**self.headers, "Authorization": f"Bearer {access_token}"}
+        if self.auto_refresh:
+            self._schedule_refresh()
 
     def authenticate(self):
         """
             Authenticates the user and retrieves an access token.
         """
-        response_auth = re.post(url=f'{self.get_base_url()}/auth/login',
-                                data={"email": self.email, "password": self.password}, headers={"x-api-key": self.api_key})
-        response = response_auth.json()
-
-        if response_auth.status_code >= 200:
-            self.access_token = response["accessToken"]
-            self.headers["Authorization"] = f"Bearer {self.access_token}"
-            expires_in = response["expiresIn"]
-            self.token_expiry = datetime.now() + timedelta(seconds=expires_in)
-        else:
-            raise AuthenticationError(f"Authentication Failed: {response.text}")
+        self._check_deadline()
+        response_auth = self.transport.send("POST", f'{self.get_base_url()}/auth/login', data=self._login_payload(),
+                                            headers=self._auth_headers(), timeout=self._timeout())
+        self._store_token(response_auth)
 
     def refresh_token(self):
-        if self.email and self.password:
-            self.authenticate()
-        else:
+        """
+            Re-authenticates, sharing a single login between every thread that asks at the same time.
+
+            A caller that arrives after another thread already replaced the token it saw as expired returns without
+            logging in again.
+        """
+        if not (self.email and self.password):
             raise AuthenticationError("Cannot refresh token without credentials")
+
+        stale_token = self.access_token
+        deadline = current_deadline()
+        try:
+            self._refresh_flight.do("token", self._refresh_if_stale, stale_token,
+                                    wait_timeout=deadline.remaining() if deadline is not None else None)
+        except TimeoutError:
+            raise DeadlineExceededError("Deadline exceeded while waiting for the token refresh") from None
+
+    def _refresh_if_stale(self, stale_token):
+        if self.access_token is not stale_token and not self.token_expired():
+            return
+        self._login()
+
+    def token_store_key(self):
+        """
+            Returns the key under which this client's token is shared in the token store.
+
+            Returns:
+            -------
+            str
+                A hash of the environment, email and API key.
+        """
+        if self._credential_key is None:
+            identity = f"{self.environment}:{self.email}:{self.api_key}"
+            self._credential_key = hashlib.sha256(identity.encode()).hexdigest()[:32]
+        return self._credential_key
+
+    def _adopt_stored_token(self, key):
+        """
+            Uses the token saved in the token store when it is not about to expire.
+
+            Returns:
+            -------
+            bool
+                True if the stored token was adopted.
+        """
+        token = self.token_store.load(key)
+        if not token or token.get("expiresAt", 0) - time.time() <= self.refresh_margin:
+            return False
+        self._set_token(token["accessToken"], datetime.fromtimestamp(token["expiresAt"]))
+        return True
+
+    def _save_token(self, key):
+        self.token_store.save(key, {"accessToken": self.access_token, "expiresAt": self.token_expiry.timestamp()})
+
+    def _login(self):
+        """
+            Authenticates, or adopts a fresh token that another client saved in the token store.
+        """
+        if self.token_store is None:
+            self.authenticate()
+            return
+
+        key = self.token_store_key()
+        with self.token_store.lock(key):
+            if self._adopt_stored_token(key):
+                return
+            self.authenticate()
+            self._save_token(key)
+
+    def _seconds_until_refresh(self):
+        if not self._refresh_at:
+            return 0
+        return (self._refresh_at - datetime.now()).total_seconds()
+
+    def _seconds_until_expiry(self):
+        if not self.token_expiry:
+            return 0
+        return (self.token_expiry - datetime.now()).total_seconds()
+
+    def _schedule_refresh(self):
+        """
+            Starts the background refresher thread if it is not already running.
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name="killb-token-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        delay = self._seconds_until_refresh()
+        while not self._closed.wait(max(delay, 0)):
+            if self._seconds_until_refresh() > 0:
+                delay = self._seconds_until_refresh()
+                continue
+            try:
+                self._refresh_flight.do("token", self._login)
+                delay = max(self._seconds_until_refresh(), 1)
+            except Exception:
+                # Keep serving the current token and try again shortly; request() still refreshes on expiry.
+                delay = min(max(self._seconds_until_expiry() / 2, 1), 30)
@@ -0,0 +1,293 @@
+import asyncio
+import time
+from killb.api_requests import ApiRequests, _Attempt
+from killb.exceptions import KillBApiError, AuthenticationError, DeadlineExceededError
+from killb.deadline import Deadline, current_deadline, detached_context
+from killb.single_flight import AsyncSingleFlight
+
+
+async def _acquire(lock):
+    """
+        Acquires a blocking lock in a worker thread. If the caller is cancelled while waiting, the thread still
+        acquires the lock, so it is released as soon as it does instead of being held forever.
+    """
+    acquiring = asyncio.ensure_future(asyncio.to_thread(lock.__enter__))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        def release(done):
+            if not done.cancelled() and done.exception() is None:
+                lock.__exit__(None, None, None)
+
+        acquiring.add_done_callback(release)
+        raise
+
+
+class AsyncApiRequests(ApiRequests):
+    """
+        An asyncio counterpart of ApiRequests built on httpx.
+
+        It shares its configuration, base URL handling and response parsing with ApiRequests, but every network
+        call is a coroutine. Token refreshes are shared between concurrent callers, so when the token expires only
+        one login is sent and cancelling a waiting request does not abort the refresh for the others.
+
+        Attributes:
+        ----------
+        transport : AsyncHttpxTransport
+            The pooled async transport reused by every request made by this instance.
+
+        Methods:
+        -------
+        authenticate():
+            Coroutine that authenticates the user and retrieves an access token.
+        request(method, endpoint, **kwargs) -> dict:
+            Coroutine that makes a request to the API and handles authentication.
+        close():
+            Coroutine that closes the client and every pooled connection.
+    """
+    def __init__(self, environment: str, email: str, password: str, api_key: str = None, **kwargs):
+        """
+            Constructs all the necessary attributes for the AsyncApiRequests object.
+
+            Parameters:
+            ----------
+            environment : str
+                The environment that want to execute the API request.
+            email : str
+                The email for authentication.
+            password : str
+                The password for authentication.
+            api_key : str, optional
+                An API key for authentication.
+            **kwargs :
+                Connection pool options accepted by ApiRequests.
+        """
+        super().__init__(environment=environment, email=email, password=password, api_key=api_key, **kwargs)
+        self._async_refresh_flight = AsyncSingleFlight()
+        self._async_read_flight = AsyncSingleFlight()
+
+    def _build_transport(self):
+        """
+            Builds the pooled httpx transport used for every request.
+
+            Returns:
+            -------
+            AsyncHttpxTransport
+                A transport that keeps up to `max_connections_per_host` connections open, over HTTP/2 when `http2`
+                is set.
+        """
+        try:
+            from killb.transport import AsyncHttpxTransport
+            return AsyncHttpxTransport(max_connections_per_host=self.max_connections_per_host,
+                                       keep_alive=self.keep_alive, http2=self.http2)
+        except ImportError:
+            raise ImportError("AsyncApiRequests requires httpx. Install it with "
+                              "`pip install killb-sdk-python[async]`.") from None
+
+    async def close(self):
+        """
+            Closes the client, every pooled connection and the background token refresher.
+        """
+        self._closed.set()
+        if self._refresher is not None:
+            self._refresher.cancel()
+        if self._transport is not None:
+            await self._transport.close()
+
+    async def request(self, method, endpoint, timeout=None, deadline=None, **kwargs):
+        """
+            Makes a request to the API and handles authentication.
+
+            Parameters:
+            ----------
+            method : str
+                The HTTP method (e.g., 'GET', 'POST', etc.).
+            endpoint : str
+                The API endpoint.
+            timeout : float or tuple, optional
+                Overrides the default timeouts for this call, either as one number or as a (connect, read) tuple.
+            deadline : float or Deadline, optional
+                A time budget in seconds for this call. Unlike the sync client, the whole call is cancelled when the
+                budget of this or the active Deadline runs out.
+            **kwargs :
+                Additional arguments to pass to httpx.
+
+            Returns:
+            -------
+            dict
+                The response from the API as a dictionary.
+        """
+        if deadline is not None:
+            with deadline if isinstance(deadline, Deadline) else Deadline(deadline):
+                return await self.request(method, endpoint, timeout, **kwargs)
+
+        deadline = current_deadline()
+        if deadline is None:
+            return await self._request(method, endpoint, timeout, **kwargs)
+        try:
+            return await asyncio.wait_for(self._request(method, endpoint, timeout, **kwargs), deadline.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError("Deadline exceeded") from None
+
+    async def _request(self, method, endpoint, timeout, **kwargs):
+        cached = self._cached(method, endpoint, kwargs)
+        if cached is not None:
+            return cached
+        if timeout is not None or not self._coalesces(method, kwargs):
+            return await self._retrying_request(method, endpoint, timeout, **kwargs)
+        # The outer wait_for in request() bounds each caller; the shared call runs without the deadline of the
+        # caller that started it, with the default timeouts, and keeps running for the others.
+        return await self._async_read_flight.do(self._read_key(method, endpoint), self._retrying_request, method,
+                                                endpoint, None, context=detached_context())
+
+    async def _retrying_request(self, method, endpoint, timeout, **kwargs):
+        call = self._prepare(method, endpoint, timeout, kwargs)
+        attempt = 0
+        try:
+            while True:
+                try:
+                    return self._remember(call, await self._send(call))
+                except KillBApiError as error:
+                    delay = self._retry_delay(attempt, call, error)
+                    if delay is None:
+                        self._raise_if_deadline_exceeded(error)
+                        raise
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            self._invalidate(call)
+
+    async def _send(self, call):
+        delay = self.hedge_policy.delay(call.method, call.endpoint) if self.hedge_policy is not None else None
+        if delay is None:
+            return await self._send_attempt(call)
+        return await self._send_hedged(call, delay)
+
+    async def _timed_attempt(self, call):
+        started = time.monotonic()
+        attempt = await self._send_attempt(call)
+        self.hedge_policy.record_latency(call.endpoint, time.monotonic() - started)
+        return attempt
+
+    async def _send_hedged(self, call, delay):
+        """
+            Races a duplicate attempt against one that has not answered after `delay` seconds and cancels the loser.
+        """
+        primary = asyncio.ensure_future(self._timed_attempt(call))
+        attempts = [primary]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if done or not self.hedge_policy.acquire(call.endpoint):
+                return await primary
+
+            hedge = asyncio.ensure_future(self._timed_attempt(call))
+            attempts.append(hedge)
+            pending = set(attempts)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.hedge_policy.record_hedge(call.endpoint, won=task is hedge)
+                        return task.result()
+                    error = error or task.exception()
+            self.hedge_policy.record_hedge(call.endpoint, won=False)
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    async def _send_attempt(self, call, attempt=None):
+        attempt = attempt or _Attempt(call.headers)
+        if self.token_expired():
+            await self.refresh_token()
+        if self.rate_limiter is not None:
+            await asyncio.sleep(self._rate_limit_wait(call.endpoint))
+        self._check_deadline()
+
+        url = f"{self.get_base_url()}/{call.endpoint}"
+        headers = self._request_headers(attempt.headers)
+        timeout = self._timeout(call.timeout)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call(call.endpoint)
+        started = time.monotonic()
+        try:
+            response = await self.transport.send(call.method, url, headers=headers, timeout=timeout, **call.kwargs)
+        except BaseException as error:
+            self._record_outcome(call, started, error)
+            raise
+        duration = time.monotonic() - started
+        self._observe(call, attempt, response)
+        if response.status_code == 304:
+            self._record_outcome(call, started, duration=duration)
+            value = self._revalidated(call, attempt)
+            if value is None:
+                return await self._send_attempt(call, attempt)
+            attempt.result = value
+            return attempt
+        attempt.result = self._handled_response(call, response, duration)
+        return attempt
+
+    async def authenticate(self):
+        """
+            Authenticates the user and retrieves an access token.
+        """
+        response_auth = await self.transport.send("POST", f'{self.get_base_url()}/auth/login',
+                                                  data=self._login_payload(), headers=self._auth_headers(),
+                                                  timeout=self._timeout())
+        self._store_token(response_auth)
+
+    async def refresh_token(self):
+        if not (self.email and self.password):
+            raise AuthenticationError("Cannot refresh token without credentials")
+
+        stale_token = self.access_token
+        await self._async_refresh_flight.do("token", self._refresh_if_stale, stale_token)
+
+    async def _refresh_if_stale(self, stale_token):
+        if self.access_token is not stale_token and not self.token_expired():
+            return
+        await self._login()
+
+    async def _login(self):
+        """
+            Authenticates, or adopts a fresh token that another client saved in the token store.
+
+            The store's lock may be held by another process, so it is acquired in a worker thread.
+        """
+        if self.token_store is None:
+            await self.authenticate()
+            return
+
+        key = self.token_store_key()
+        lock = self.token_store.lock(key)
+        await _acquire(lock)
+        try:
+            if self._adopt_stored_token(key):
+                return
+            await self.authenticate()
+            self._save_token(key)
+        finally:
+            lock.__exit__(None, None, None)
+
+    def _schedule_refresh(self):
+        """
+            Starts the background refresher task on the running event loop if it is not already running.
+        """
+        if self._refresher is not None and not self._refresher.done():
+            return
+        self._refresher = asyncio.ensure_future(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        delay = self._seconds_until_refresh()
+        while not self._closed.is_set():
+            await asyncio.sleep(max(delay, 0))
+            if self._seconds_until_refresh() > 0:
+                delay = self._seconds_until_refresh()
+                continue
+            try:
+                await self._async_refresh_flight.do("token", self._login)
+                delay = max(self._seconds_until_refresh(), 1)
+            except Exception:
+                delay = min(max(self._seconds_until_expiry() / 2, 1), 30)
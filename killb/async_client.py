@@ -0,0 +1,78 @@
+from killb.async_api_requests import AsyncApiRequests
+from killb.account import AsyncAccount
+from killb.user import AsyncUser
+from killb.quotations import AsyncQuotation
+from killb.savings import AsyncSavings
+from killb.ramp import AsyncRamps
+from killb.batch import gather_batch
+
+
+class AsyncClient:
+    """
+        AsyncClient class to interact with the KillB API from asyncio code.
+
+        It mirrors Client, but every resource method is a coroutine and all of them share one AsyncApiRequests
+        instance, so thousands of concurrent calls can run on a single event loop over one connection pool.
+        Authentication happens when the client is entered as an async context manager, or on the first request.
+
+        Attributes
+        ----------
+        api_requests : AsyncApiRequests
+            An instance of the AsyncApiRequests class used for making authenticated API requests.
+        Account : AsyncAccount
+            An instance of the AsyncAccount class to interact with account-related API endpoints.
+        User : AsyncUser
+            An instance of the AsyncUser class to interact with user-related API endpoints.
+        Quotation : AsyncQuotation
+            An instance of the AsyncQuotation class to interact with quotation-related API endpoints.
+        Savings : AsyncSavings
+            An instance of the AsyncSavings class to interact with savings-related API endpoints.
+        Ramps : AsyncRamps
+            An instance of the AsyncRamps class to interact with ramp-related API endpoints.
+
+        Methods
+        -------
+        __init__(environment: str, email: str, password: str, api_key: str = None, **kwargs)
+            Initializes the AsyncClient with the given credentials. Extra keyword arguments are forwarded to
+            AsyncApiRequests.
+        authenticate()
+            Coroutine that authenticates the user.
+        batch(calls: list, max_concurrency: int = None) -> list[BatchResult]
+            Coroutine that runs many resource calls concurrently and returns the result or error of each, in order.
+        map(fn, *iterables, max_concurrency: int = None) -> list[BatchResult]
+            Coroutine that runs `fn` concurrently for every set of arguments.
+        close()
+            Coroutine that closes the pooled connections. Also called when leaving `async with`.
+    """
+    def __init__(self, environment: str, email: str, password: str, api_key: str = None, batch_workers: int = None,
+                 **kwargs):
+        self.api_requests = AsyncApiRequests(environment=environment, email=email, password=password,
+                                             api_key=api_key, **kwargs)
+        self.batch_workers = batch_workers or self.api_requests.max_connections_per_host
+        self.Account = AsyncAccount(self.api_requests)
+        self.User = AsyncUser(self.api_requests)
+        self.Quotation = AsyncQuotation(self.api_requests)
+        self.Savings = AsyncSavings(self.api_requests)
+        self.Ramps = AsyncRamps(self.api_requests)
+
+    async def authenticate(self):
+        await self.api_requests.refresh_token()
+
+    async def batch(self, calls, max_concurrency: int = None):
+        return await gather_batch(calls, max_concurrency or self.batch_workers)
+
+    async def map(self, fn, *iterables, max_concurrency: int = None):
+        return await self.batch([(fn, *args) for args in zip(*iterables)], max_concurrency)
+
+    def pool_stats(self):
+        return self.api_requests.pool_stats()
+
+    async def close(self):
+        await self.api_requests.close()
+
+    async def __aenter__(self):
+        await self.authenticate()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
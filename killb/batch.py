@@ -0,0 +1,139 @@
+import contextvars
+import threading
+
+# Set on the threads of batch executors, so that a batch started from a batched call does not wait for a worker.
+_worker = threading.local()
+
+
+class BatchResult:
+    """
+        The outcome of one call of a batch.
+
+        Attributes
+        ----------
+        index : int
+            The position of the call in the batch.
+        result :
+            The value the call returned, or None if it failed.
+        error : Exception
+            The exception the call raised, or None if it succeeded.
+
+        Methods
+        -------
+        ok -> bool
+            Whether the call succeeded.
+        unwrap()
+            Returns the result, or raises the error.
+    """
+    __slots__ = ("index", "result", "error")
+
+    def __init__(self, index: int, result=None, error: Exception = None):
+        self.index = index
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def unwrap(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"BatchResult(index={self.index}, error={self.error!r})"
+        return f"BatchResult(index={self.index}, result={self.result!r})"
+
+
+def _split(call):
+    """
+        Returns the function and arguments of a batch item: a callable, or a tuple of a callable and its arguments.
+    """
+    if callable(call):
+        return call, ()
+    fn, *args = call
+    return fn, args
+
+
+def _run(index, fn, args):
+    try:
+        return BatchResult(index, result=fn(*args))
+    except Exception as error:
+        return BatchResult(index, error=error)
+
+
+def _mark_worker():
+    _worker.active = True
+
+
+def batch_executor(max_workers: int):
+    """
+        Returns a thread pool for run_batch whose workers run nested batches inline.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="killb-batch", initializer=_mark_worker)
+
+
+def run_batch(executor, calls):
+    """
+        Runs calls on an executor and collects every result or error, in the order of the calls.
+
+        Called from a worker of a batch_executor, i.e. from a call of another batch, the calls run one after the
+        other on the calling worker: queueing them behind the busy workers of the same executor would deadlock.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor
+            The bounded executor to run the calls on.
+        calls : iterable
+            Callables, or tuples of a callable and its positional arguments, e.g.
+            `(client.Account.get_by_id, "account-1")`.
+
+        Returns
+        -------
+        list[BatchResult]
+            One result per call. Errors are returned, not raised, so one failed call does not hide the others.
+    """
+    if getattr(_worker, "active", False):
+        return [_run(index, *_split(call)) for index, call in enumerate(calls)]
+    futures = []
+    for index, call in enumerate(calls):
+        fn, args = _split(call)
+        # Each call sees the caller's context, so an active Deadline bounds the whole batch.
+        futures.append(executor.submit(contextvars.copy_context().run, _run, index, fn, args))
+    return [future.result() for future in futures]
+
+
+async def gather_batch(calls, max_concurrency: int = None):
+    """
+        asyncio counterpart of run_batch: runs coroutine calls with at most `max_concurrency` in flight.
+
+        Parameters
+        ----------
+        calls : iterable
+            Coroutine functions, or tuples of a coroutine function and its positional arguments.
+        max_concurrency : int, optional
+            The maximum number of calls awaited at once (default: no limit).
+
+        Returns
+        -------
+        list[BatchResult]
+            One result per call, in the order of the calls.
+    """
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def run(index, fn, args):
+        try:
+            if semaphore is None:
+                return BatchResult(index, result=await fn(*args))
+            async with semaphore:
+                return BatchResult(index, result=await fn(*args))
+        except Exception as error:
+            return BatchResult(index, error=error)
+
+    return await asyncio.gather(*(run(index, *_split(call)) for index, call in enumerate(calls)))
@@ -0,0 +1,71 @@
+import time
+import tracemalloc
+from collections import namedtuple
+
+Measurement = namedtuple("Measurement", ["calls", "wall_per_call", "cpu_per_call", "peak_bytes_per_call",
+                                         "retained_bytes_per_call", "allocated_blocks_per_call"])
+Measurement.__doc__ = """
+    The cost of one call, averaged over `calls` runs.
+
+    Times are in seconds. `peak_bytes_per_call` is the average peak of memory allocated during a call,
+    `retained_bytes_per_call` the memory still held after it, and `allocated_blocks_per_call` the number of memory
+    blocks still held after it, which should stay near zero for calls that do not cache anything.
+"""
+
+
+def measure(fn, *args, calls: int = 1000, warmup: int = 10, **kwargs):
+    """
+        Measures the SDK's own CPU time and memory allocations per call.
+
+        Run it against a client built on a MemoryTransport or a replaying CassetteTransport, so that the network is
+        out of the picture and only the SDK's overhead is measured. Times are taken in a first pass without tracing,
+        and memory in a second pass with tracemalloc, which slows calls down.
+
+        Example
+        -------
+        client = Client("SANDBOX", email, password, api_key, transport=CassetteTransport("ramps.json"))
+        print(measure(client.Ramps.get_by_query, {"status": "COMPLETED"}, calls=5000))
+
+        Parameters
+        ----------
+        fn : callable
+            The call to measure, e.g. `client.User.get_by_query`.
+        *args, **kwargs
+            Passed to `fn`.
+        calls : int, optional
+            The number of measured calls (default 1000).
+        warmup : int, optional
+            The number of calls made first, e.g. to log in and fill caches (default 10).
+
+        Returns
+        -------
+        Measurement
+            The average wall time, CPU time and memory per call.
+    """
+    for _ in range(warmup):
+        fn(*args, **kwargs)
+
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    for _ in range(calls):
+        fn(*args, **kwargs)
+    wall, cpu = time.perf_counter() - wall_started, time.process_time() - cpu_started
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        started = tracemalloc.take_snapshot()
+        baseline = tracemalloc.get_traced_memory()[0]
+        peaks = 0
+        for _ in range(calls):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn(*args, **kwargs)
+            peaks += tracemalloc.get_traced_memory()[1] - current
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        blocks = sum(stat.count_diff for stat in tracemalloc.take_snapshot().compare_to(started, "filename"))
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return Measurement(calls, wall / calls, cpu / calls, peaks / calls, retained / calls, blocks / calls)
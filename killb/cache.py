@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import OrderedDict
+from killb.endpoints import endpoint_path, endpoint_template
+
+DEFAULT_TTLS = {
+    "accounts/{id}": 300,
+    "savings/{id}/deposit-instructions/{id}": 3600,
+    "savings/{id}/crypto-deposit-instructions": 3600,
+}
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "etag", "last_modified")
+
+    def __init__(self, value, size, expires_at, etag=None, last_modified=None):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+def _mentions(value, record_id):
+    """
+        Returns whether a cached response is, or lists, the record with the given id.
+    """
+    if isinstance(value, dict):
+        if value.get("id") == record_id:
+            return True
+        value = next((item for item in value.values() if isinstance(item, list)), None)
+    if isinstance(value, list):
+        return any(isinstance(item, dict) and item.get("id") == record_id for item in value)
+    return False
+
+
+class ResponseCache:
+    """
+        A thread-safe read-through cache for parsed GET responses, with TTLs and LRU eviction.
+
+        Only endpoint templates with a TTL are cached: those in `endpoint_ttls` (by default account records, deposit
+        instructions and wallet addresses) and, when `default_ttl` is set, every other GET. Entries are keyed by
+        credential and endpoint, including the query string. When the cache holds more than `max_entries` entries
+        or `max_bytes` bytes of response bodies, the least recently used entries are evicted.
+
+        Mutations sent through the SDK invalidate what they may change, whether they succeed or not: a POST
+        invalidates every entry under its top-level resource (e.g. `Savings.create` clears `savings/...`), and a
+        PATCH, PUT or DELETE invalidates the entries under the mutated record and the resource's list queries
+        (e.g. `Account.update` clears `accounts/{account_id}` and `accounts?...`) along with any other entry of the
+        resource that contains the record, such as the user's accounts cached by `Account.get_by_user`.
+
+        Responses carrying an `ETag` or `Last-Modified` header keep their validators. Once they expire they are not
+        dropped but revalidated: the next request is sent with `If-None-Match` / `If-Modified-Since`, and a 304
+        response reuses the stored parsed object for another TTL without downloading or decoding the body again.
+
+        Cached objects are shared between callers and must not be mutated.
+
+        Attributes
+        ----------
+        endpoint_ttls : dict
+            TTLs in seconds per endpoint template (default DEFAULT_TTLS). A TTL of 0 disables caching.
+        default_ttl : float
+            The TTL of GETs whose template is not in `endpoint_ttls` (default 0, i.e. not cached).
+        max_entries : int
+            The maximum number of cached responses (default 1024).
+        max_bytes : int
+            The maximum total size of the cached response bodies (default 8 MiB).
+
+        Methods
+        -------
+        ttl(endpoint: str) -> float
+            Returns the TTL that applies to an endpoint.
+        get(credential: str, endpoint: str)
+            Returns the cached response, or None on a miss.
+        put(credential: str, endpoint: str, value, size: int, etag: str = None, last_modified: str = None)
+            Caches a parsed response whose body was `size` bytes long, with its validators.
+        conditional_headers(credential: str, endpoint: str) -> dict
+            Returns the `If-None-Match` / `If-Modified-Since` headers that revalidate an expired entry.
+        revalidate(credential: str, endpoint: str, etag: str = None, last_modified: str = None)
+            Renews an entry after a 304 response and returns its value, or None if it was evicted meanwhile.
+        invalidate(endpoint: str, method: str = "POST") -> int
+            Drops the entries a mutation of the endpoint may change and returns how many were dropped.
+        clear()
+            Drops every entry.
+        stats() -> dict
+            Returns the entries, bytes, hits, misses, evictions, expirations, revalidations and invalidations.
+    """
+    def __init__(self, endpoint_ttls: dict = None, default_ttl: float = 0, max_entries: int = 1024,
+                 max_bytes: int = 8 * 1024 * 1024):
+        self.endpoint_ttls = dict(DEFAULT_TTLS if endpoint_ttls is None else endpoint_ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "revalidations": 0,
+                          "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def ttl(self, endpoint):
+        return self.endpoint_ttls.get(endpoint_template(endpoint), self.default_ttl)
+
+    def _drop(self, key):
+        # Callers hold self._lock.
+        self._bytes -= self._entries.pop(key).size
+
+    def get(self, credential, endpoint):
+        key = (credential, endpoint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                # Entries with validators stay around, stale, so that they can be revalidated.
+                if entry.etag is None and entry.last_modified is None:
+                    self._drop(key)
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry.value
+
+    def put(self, credential, endpoint, value, size, etag=None, last_modified=None):
+        ttl = self.ttl(endpoint)
+        if not ttl or size > self.max_bytes:
+            return
+        key = (credential, endpoint)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(value, size, time.monotonic() + ttl, etag, last_modified)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def conditional_headers(self, credential, endpoint):
+        with self._lock:
+            entry = self._entries.get((credential, endpoint))
+            if entry is None:
+                return {}
+            headers = {}
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+            return headers
+
+    def revalidate(self, credential, endpoint, etag=None, last_modified=None):
+        key = (credential, endpoint)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.expires_at = time.monotonic() + self.ttl(endpoint)
+            entry.etag = etag or entry.etag
+            entry.last_modified = last_modified or entry.last_modified
+            self._entries.move_to_end(key)
+            self._counters["revalidations"] += 1
+            return entry.value
+
+    def invalidate(self, endpoint, method="POST"):
+        segments = endpoint_path(endpoint).split("/")
+        resource = segments[0]
+        record = "/".join(segments[:2]) if method.upper() != "POST" and len(segments) > 1 else None
+
+        record_id = segments[1] if record is not None else None
+
+        def affected(path, entry):
+            if record is None:
+                return path == resource or path.startswith(f"{resource}/")
+            if path == resource or path == record or path.startswith(f"{record}/"):
+                return True
+            # The record may also be cached under its owner, e.g. `Account.get_by_user` caches a user's accounts
+            # at `accounts/{user_id}`, the same route as `accounts/{account_id}`.
+            return path.startswith(f"{resource}/") and _mentions(entry.value, record_id)
+
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if affected(endpoint_path(key[1]), entry)]
+            for key in keys:
+                self._drop(key)
+            self._counters["invalidations"] += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, **self._counters}
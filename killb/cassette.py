@@ -0,0 +1,195 @@
+import base64
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+from killb.exceptions import CassetteError
+from killb.transport import Transport, Response
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Hop-by-hop and encoding headers describe the recorded connection, not the response; bodies are stored decoded.
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive", "date"}
+_LOGIN_PATH = "auth/login"
+
+
+def _body_text(body):
+    if body is None:
+        return None
+    if isinstance(body, dict):
+        return json.dumps(body, sort_keys=True)
+    if isinstance(body, bytes):
+        return body.decode("utf-8", errors="replace")
+    return str(body)
+
+
+def _request_key(method, url):
+    parts = urlsplit(url)
+    return f"{method.upper()} {parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+class CassetteTransport(Transport):
+    """
+        Records real traffic to a JSON cassette once and replays it without the network.
+
+        In `record` mode every request goes through `transport` (a pooled RequestsTransport by default) and the
+        exchange is appended to the cassette, which is written by `save()` or `close()`. In `replay` mode requests are
+        answered from the cassette: exchanges are matched on the method, URL path and query, preferring the one
+        with the same body, and served in recorded order; once a route's exchanges are used up its last one is
+        repeated, so a short recording can drive a long benchmark. Unrecorded requests raise CassetteError.
+
+        Passwords in login requests and access tokens in login responses are never written to the cassette.
+
+        Example
+        -------
+        recorder = CassetteTransport("ramps.json", mode="record")
+        with Client("SANDBOX", email, password, api_key, transport=recorder) as client:
+            client.Ramps.get_by_query({"status": "COMPLETED"})
+
+        client = Client("SANDBOX", email, password, api_key, transport=CassetteTransport("ramps.json"))
+
+        Attributes
+        ----------
+        path : str
+            The cassette file.
+        mode : str
+            `record` or `replay` (default `replay`).
+        interactions : list
+            The recorded exchanges.
+
+        Methods
+        -------
+        send(method: str, url: str, headers: dict, content: bytes, data: dict, timeout: tuple, **kwargs) -> Response
+            Sends and records the request, or replays its recorded response.
+        save()
+            Writes the cassette atomically.
+        close()
+            Saves the cassette when recording, and closes the wrapped transport.
+    """
+    def __init__(self, path: str, mode: str = REPLAY, transport: Transport = None):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.transport = transport
+        self.interactions = []
+        self._routes = {}
+        self._positions = {}
+        self._replayed = 0
+        self._lock = threading.Lock()
+        if mode == RECORD:
+            if self.transport is None:
+                from killb.transport import RequestsTransport
+                self.transport = RequestsTransport()
+        else:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as cassette:
+                self.interactions = json.load(cassette)["interactions"]
+        except FileNotFoundError as error:
+            raise CassetteError(f"Cassette not found: {self.path}") from error
+        for interaction in self.interactions:
+            request = interaction["request"]
+            self._routes.setdefault(_request_key(request["method"], request["url"]), []).append(interaction)
+        # Responses are built once, so replaying costs a lookup rather than a decode.
+        for interaction in self.interactions:
+            interaction["_response"] = self._response(interaction["response"])
+
+    @staticmethod
+    def _response(recorded):
+        if recorded.get("base64"):
+            content = base64.b64decode(recorded["body"])
+        else:
+            content = recorded["body"].encode("utf-8")
+        return Response(recorded["status_code"], recorded["headers"], content)
+
+    def _replay(self, method, url, body):
+        key = _request_key(method, url)
+        with self._lock:
+            candidates = self._routes.get(key)
+            if not candidates:
+                raise CassetteError(f"No recorded response for {key}")
+            remaining = self._positions.get(key)
+            if remaining is None:
+                remaining = self._positions[key] = list(range(len(candidates)))
+            self._replayed += 1
+            if not remaining:
+                return candidates[-1]["_response"]
+            position = next((position for position, index in enumerate(remaining)
+                             if candidates[index]["request"]["body"] == body), 0)
+            return candidates[remaining.pop(position)]["_response"]
+
+    def _record(self, method, url, body, response):
+        login = urlsplit(url).path.rstrip("/").endswith(_LOGIN_PATH)
+        content = response.content
+        if login and response.ok:
+            recorded = json.loads(content)
+            recorded["accessToken"] = "cassette-token"
+            content = json.dumps(recorded).encode("utf-8")
+        try:
+            body_text, encoded = content.decode("utf-8"), False
+        except UnicodeDecodeError:
+            body_text, encoded = base64.b64encode(content).decode("ascii"), True
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _DROPPED_HEADERS}
+        with self._lock:
+            self.interactions.append({
+                "request": {"method": method.upper(), "url": url, "body": None if login else body},
+                "response": {"status_code": response.status_code, "headers": headers, "body": body_text,
+                             "base64": encoded},
+            })
+
+    def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+        body = _body_text(content if content is not None else data)
+        if self.mode == REPLAY:
+            return self._replay(method, url, body)
+        response = self.transport.send(method, url, headers=headers, content=content, data=data, timeout=timeout,
+                                       **kwargs)
+        self._record(method, url, body, response)
+        return response
+
+    def save(self):
+        with self._lock:
+            interactions = [{"request": interaction["request"], "response": interaction["response"]}
+                            for interaction in self.interactions]
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as cassette:
+            json.dump({"version": 1, "interactions": interactions}, cassette, indent=2)
+        os.replace(temporary, self.path)
+
+    def pool_stats(self):
+        if self.mode == RECORD:
+            return self.transport.pool_stats()
+        return {"requests": self._replayed}
+
+    def close(self):
+        if self.mode == RECORD:
+            self.save()
+            self.transport.close()
+
+
+class AsyncCassetteTransport(CassetteTransport):
+    """
+        asyncio counterpart of CassetteTransport. Records through an AsyncHttpxTransport by default.
+    """
+    def __init__(self, path: str, mode: str = REPLAY, transport: Transport = None):
+        if mode == RECORD and transport is None:
+            from killb.transport import AsyncHttpxTransport
+            transport = AsyncHttpxTransport()
+        super().__init__(path, mode, transport)
+
+    async def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+        body = _body_text(content if content is not None else data)
+        if self.mode == REPLAY:
+            return self._replay(method, url, body)
+        response = await self.transport.send(method, url, headers=headers, content=content, data=data,
+                                             timeout=timeout, **kwargs)
+        self._record(method, url, body, response)
+        return response
+
+    async def close(self):
+        if self.mode == RECORD:
+            self.save()
+            await self.transport.close()
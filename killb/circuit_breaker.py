@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import deque
+from killb.endpoints import endpoint_template
+from killb.exceptions import KillBApiError, NetworkError, CircuitOpenError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    def __init__(self, window_size):
+        self.state = CLOSED
+        self.window = deque(maxlen=window_size)
+        self.opened_at = 0.0
+        self.trial_calls = 0
+        self.trial_successes = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+        Fails fast on endpoints that are failing or slow, with one circuit per endpoint template.
+
+        A closed circuit records the outcome of the last `window_size` calls. Once it holds at least
+        `minimum_calls` outcomes and the share of failures reaches `failure_rate_threshold`, or the share of calls
+        slower than `slow_call_duration` reaches `slow_call_rate_threshold`, the circuit opens and every call raises
+        CircuitOpenError without touching the network. After `open_duration` seconds the circuit half-opens and lets
+        `half_open_max_calls` trial calls through: if they all succeed quickly it closes, otherwise it opens again.
+
+        Network errors and 5xx responses count as failures. Other 4xx responses, including 429, say nothing about
+        the health of the route and count as successes.
+
+        Attributes
+        ----------
+        failure_rate_threshold : float
+            The share of failed calls that opens the circuit (default 0.5).
+        slow_call_rate_threshold : float
+            The share of slow calls that opens the circuit (default 1.0, i.e. only when every call is slow).
+        slow_call_duration : float
+            The duration in seconds above which a call counts as slow (default 10).
+        window_size : int
+            The number of most recent calls considered (default 20).
+        minimum_calls : int
+            The number of calls needed before the rates are evaluated (default 10).
+        open_duration : float
+            How many seconds the circuit stays open before half-opening (default 30).
+        half_open_max_calls : int
+            The number of trial calls let through while half-open (default 3).
+
+        Methods
+        -------
+        before_call(endpoint: str)
+            Raises CircuitOpenError when the endpoint's circuit rejects the call.
+        record(endpoint: str, duration: float, error: Exception = None)
+            Records the outcome of a call that was let through.
+        state(endpoint: str) -> str
+            Returns `closed`, `open` or `half_open`.
+        stats() -> dict
+            Returns the state, failure rate, slow call rate and rejections per endpoint template.
+    """
+    def __init__(self, failure_rate_threshold: float = 0.5, slow_call_rate_threshold: float = 1.0,
+                 slow_call_duration: float = 10, window_size: int = 20, minimum_calls: int = 10,
+                 open_duration: float = 30, half_open_max_calls: int = 3):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.window_size = window_size
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, template):
+        circuit = self._circuits.get(template)
+        if circuit is None:
+            with self._lock:
+                circuit = self._circuits.setdefault(template, _Circuit(self.window_size))
+        return circuit
+
+    @staticmethod
+    def is_failure(error):
+        if error is None:
+            return False
+        if isinstance(error, NetworkError):
+            return True
+        return isinstance(error, KillBApiError) and (error.status_code or 0) >= 500
+
+    def before_call(self, endpoint):
+        template = endpoint_template(endpoint)
+        circuit = self._circuit(template)
+        with circuit.lock:
+            if circuit.state == OPEN:
+                remaining = circuit.opened_at + self.open_duration - time.monotonic()
+                if remaining > 0:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(f"Circuit open for {template}, retry in {remaining:.1f}s",
+                                           endpoint=template, retry_after=remaining)
+                circuit.state = HALF_OPEN
+                circuit.trial_calls = 0
+                circuit.trial_successes = 0
+            if circuit.state == HALF_OPEN:
+                if circuit.trial_calls >= self.half_open_max_calls:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(f"Circuit half-open for {template}, trial calls in progress",
+                                           endpoint=template, retry_after=0)
+                circuit.trial_calls += 1
+
+    def _open(self, circuit):
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.window.clear()
+
+    def record(self, endpoint, duration, error=None):
+        circuit = self._circuit(endpoint_template(endpoint))
+        failed = self.is_failure(error)
+        slow = duration >= self.slow_call_duration
+        with circuit.lock:
+            if circuit.state == HALF_OPEN:
+                if failed or slow:
+                    self._open(circuit)
+                    return
+                circuit.trial_successes += 1
+                if circuit.trial_successes >= self.half_open_max_calls:
+                    circuit.state = CLOSED
+                    circuit.window.clear()
+                return
+            if circuit.state == OPEN:
+                return
+
+            circuit.window.append((failed, slow))
+            calls = len(circuit.window)
+            if calls < self.minimum_calls:
+                return
+            failure_rate = sum(outcome[0] for outcome in circuit.window) / calls
+            slow_rate = sum(outcome[1] for outcome in circuit.window) / calls
+            if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._open(circuit)
+
+    def state(self, endpoint):
+        circuit = self._circuit(endpoint_template(endpoint))
+        with circuit.lock:
+            if circuit.state == OPEN and time.monotonic() - circuit.opened_at >= self.open_duration:
+                return HALF_OPEN
+            return circuit.state
+
+    def stats(self):
+        stats = {}
+        with self._lock:
+            circuits = dict(self._circuits)
+        for template, circuit in circuits.items():
+            with circuit.lock:
+                calls = len(circuit.window)
+                stats[template] = {
+                    "state": circuit.state,
+                    "calls": calls,
+                    "failure_rate": sum(outcome[0] for outcome in circuit.window) / calls if calls else 0.0,
+                    "slow_call_rate": sum(outcome[1] for outcome in circuit.window) / calls if calls else 0.0,
+                    "rejected": circuit.rejected,
+                }
+        return stats
@@ -1,9 +1,15 @@
+import threading
+from importlib import import_module
 from killb.api_requests import ApiRequests
-from killb.account import Account
-from killb.user import User
-from killb.quotations import Quotation
-from killb.savings import Savings
-from killb.ramp import Ramps
+from killb.batch import batch_executor, run_batch
+
+_RESOURCES = {
+    "Account": ("killb.account", "Account"),
+    "User": ("killb.user", "User"),
+    "Quotation": ("killb.quotations", "Quotation"),
+    "Savings": ("killb.savings", "Savings"),
+    "Ramps": ("killb.ramp", "Ramps"),
+}
 
 
 class Client:
@@ -25,17 +31,104 @@ class Client:
             An instance of the Quotation class to interact with quotation-related API endpoints.
         Savings : Savings
             An instance of the Savings class to interact with savings-related API endpoints.
+        Ramps : Ramps
+            An instance of the Ramps class to interact with ramp-related API endpoints.
 
         Methods
         -------
-        __init__(environment: str, email: str, password: str, api_key: str = None)
-            Initializes the Client with the given credentials and authenticates the user.
+        __init__(environment: str, email: str, password: str, api_key: str = None, lazy: bool = False, **kwargs)
+            Initializes the Client with the given credentials and authenticates the user. With `lazy=True` the
+            login waits until the first request, and each resource (and its module) is only created the first time
+            it is accessed. Extra keyword arguments (e.g. `pool_size`, `keep_alive`, `auto_refresh`, `token_store`)
+            are forwarded to ApiRequests.
+        batch(calls: list) -> list[BatchResult]
+            Runs many resource calls concurrently and returns the result or error of each, in order.
+        map(fn, *iterables) -> list[BatchResult]
+            Runs `fn` concurrently for every set of arguments, e.g. `client.map(client.Account.get_by_id, ids)`.
+        pool_stats() -> dict
+            Returns connection reuse statistics for the underlying connection pool.
+        close()
+            Closes the pooled connections. Also called when the client is used as a context manager.
     """
-    def __init__(self, environment: str, email: str, password: str, api_key: str = None):
-        self.api_requests = ApiRequests(environment=environment, email=email, password=password, api_key=api_key)
-        self.api_requests.authenticate()
-        self.Account = Account(self.api_requests)
-        self.User = User(self.api_requests)
-        self.Quotation = Quotation(self.api_requests)
-        self.Savings = Savings(self.api_requests)
-        self.Ramps = Ramps(self.api_requests)
+    def __init__(self, environment: str, email: str, password: str, api_key: str = None, lazy: bool = False,
+                 batch_workers: int = None, **kwargs):
+        self.api_requests = ApiRequests(environment=environment, email=email, password=password, api_key=api_key,
+                                        **kwargs)
+        self.batch_workers = batch_workers or self.api_requests.max_connections_per_host
+        self._batch_executor = None
+        self._batch_lock = threading.Lock()
+        if not lazy:
+            self.api_requests.refresh_token()
+            for name in _RESOURCES:
+                self._load_resource(name)
+
+    def _load_resource(self, name):
+        module_name, class_name = _RESOURCES[name]
+        resource = getattr(import_module(module_name), class_name)(self.api_requests)
+        setattr(self, name, resource)
+        return resource
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not set yet, i.e. resources of a lazy client.
+        if name in _RESOURCES:
+            return self._load_resource(name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _executor(self):
+        if self._batch_executor is None:
+            with self._batch_lock:
+                if self._batch_executor is None:
+                    self._batch_executor = batch_executor(self.batch_workers)
+        return self._batch_executor
+
+    def batch(self, calls):
+        """
+            Runs many resource calls concurrently and returns the result or error of each.
+
+            Calls run on one executor per client, bounded by `batch_workers` (by default the connection pool size),
+            and share the client's connection pool and access token. Batches started from several threads at once
+            share the same bound. A batch started from a batched call, e.g. by `LocalMirror.sync`, runs its calls
+            one after the other on that call's worker.
+
+            Parameters
+            ----------
+            calls : list
+                Callables, or tuples of a resource method and its arguments.
+
+            Returns
+            -------
+            list[BatchResult]
+                One result per call, in order. Failed calls carry their exception in `error` instead of raising.
+
+            Example
+            -------
+            results = client.batch([(client.Account.get_by_id, "account-1"),
+                                    (client.Savings.get_balance, "savings-1")])
+            balances = [result.result for result in results if result.ok]
+        """
+        return run_batch(self._executor(), calls)
+
+    def map(self, fn, *iterables):
+        """
+            Runs `fn` concurrently for every set of arguments taken from the iterables, like the built-in `map`.
+
+            Returns
+            -------
+            list[BatchResult]
+                One result per set of arguments, in order.
+        """
+        return self.batch([(fn, *args) for args in zip(*iterables)])
+
+    def pool_stats(self):
+        return self.api_requests.pool_stats()
+
+    def close(self):
+        if self._batch_executor is not None:
+            self._batch_executor.shutdown(wait=False)
+        self.api_requests.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,74 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+
+
+def _default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JsonCodec:
+    """
+        Encodes request bodies and decodes response bodies with the standard library's json module.
+
+        Enum members are written as their values, so the types modules' enums such as `FromCurrency` or
+        `CashInMethod` can be used directly in request data. Dates are written in ISO 8601 format and Decimals as
+        strings.
+
+        Methods
+        -------
+        encode(data) -> bytes
+            Serializes data to UTF-8 JSON.
+        decode(content: bytes)
+            Parses a JSON body from raw bytes.
+    """
+    content_type = "application/json"
+
+    def encode(self, data):
+        return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, content):
+        return json.loads(content)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+        A JsonCodec backed by orjson (`pip install killb-sdk-python[orjson]`), several times faster on both sides.
+
+        orjson serializes Enums, dates and dataclasses natively, and reads and writes bytes without intermediate
+        strings.
+    """
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError as error:
+            raise ImportError("OrjsonCodec requires orjson: `pip install killb-sdk-python[orjson]`") from error
+        self._orjson = orjson
+
+    def encode(self, data):
+        return self._orjson.dumps(data, default=_default)
+
+    def decode(self, content):
+        return self._orjson.loads(content)
+
+
+def best_codec():
+    """
+        Returns the fastest codec available in this environment.
+
+        Returns
+        -------
+        JsonCodec
+            An OrjsonCodec when orjson is installed, a JsonCodec otherwise.
+    """
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return JsonCodec()
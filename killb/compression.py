@@ -0,0 +1,148 @@
+import gzip
+import threading
+import zlib
+from collections import namedtuple
+
+_brotli = None
+_brotli_checked = False
+
+TransferStats = namedtuple("TransferStats", ["method", "endpoint", "content_encoding", "response_wire_bytes",
+                                             "response_bytes", "request_wire_bytes", "request_bytes"])
+TransferStats.__doc__ = """
+    Byte counts of a single call.
+
+    `response_wire_bytes` is the size of the response body as received, before decompression, and `response_bytes`
+    its size after. `request_wire_bytes` and `request_bytes` are the sizes of the request body after and before
+    compression.
+"""
+
+
+def _load_brotli():
+    global _brotli, _brotli_checked
+    if not _brotli_checked:
+        try:
+            import brotli as module
+        except ImportError:
+            try:
+                import brotlicffi as module
+            except ImportError:
+                module = None
+        _brotli, _brotli_checked = module, True
+    return _brotli
+
+
+def accept_encoding():
+    """
+        Returns the `Accept-Encoding` header value for the encodings this environment can decode.
+
+        Returns
+        -------
+        str
+            `gzip, deflate`, plus `br` when brotli or brotlicffi is installed.
+    """
+    return "gzip, deflate, br" if _load_brotli() is not None else "gzip, deflate"
+
+
+def decode_content(body: bytes, content_encoding: str = None) -> bytes:
+    """
+        Decompresses a response body according to its `Content-Encoding`.
+
+        Parameters
+        ----------
+        body : bytes
+            The body as received.
+        content_encoding : str, optional
+            The `Content-Encoding` header, possibly listing several encodings in the order they were applied.
+
+        Returns
+        -------
+        bytes
+            The decompressed body.
+
+        Raises
+        ------
+        ValueError
+            When an encoding is not supported or the body is corrupt.
+    """
+    if not body or not content_encoding:
+        return body
+    for encoding in reversed([value.strip().lower() for value in content_encoding.split(",")]):
+        try:
+            body = _decode(body, encoding)
+        except ValueError:
+            raise
+        except Exception as error:
+            # zlib.error, or the error type of whichever brotli package is installed.
+            raise ValueError(f"Corrupt {encoding} response body: {error}") from error
+    return body
+
+
+def _decode(body, encoding):
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate data without the zlib header.
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == "br" and _load_brotli() is not None:
+        return _brotli.decompress(body)
+    if encoding not in ("identity", ""):
+        raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+    return body
+
+
+def compress_body(body: bytes, min_size: int = 1024):
+    """
+        Gzips a request body when it is at least `min_size` bytes long.
+
+        Parameters
+        ----------
+        body : bytes
+            The encoded request body.
+        min_size : int, optional
+            Bodies smaller than this are sent as they are (default 1024).
+
+        Returns
+        -------
+        tuple
+            The body to send and its `Content-Encoding`, or None when it was not compressed.
+    """
+    if body is None or len(body) < min_size:
+        return body, None
+    return gzip.compress(body, compresslevel=6), "gzip"
+
+
+class CompressionStats:
+    """
+        Thread-safe running totals of transferred bytes per endpoint template.
+
+        Methods
+        -------
+        record(template: str, transfer: TransferStats)
+            Adds a call's byte counts to the template's totals.
+        as_dict() -> dict
+            Returns the totals per template, with the compression ratio of responses.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, template, transfer):
+        with self._lock:
+            totals = self._totals.setdefault(template, {"calls": 0, "response_wire_bytes": 0, "response_bytes": 0,
+                                                        "request_wire_bytes": 0, "request_bytes": 0})
+            totals["calls"] += 1
+            totals["response_wire_bytes"] += transfer.response_wire_bytes
+            totals["response_bytes"] += transfer.response_bytes
+            totals["request_wire_bytes"] += transfer.request_wire_bytes
+            totals["request_bytes"] += transfer.request_bytes
+
+    def as_dict(self):
+        with self._lock:
+            stats = {template: dict(totals) for template, totals in self._totals.items()}
+        for totals in stats.values():
+            totals["response_ratio"] = (totals["response_wire_bytes"] / totals["response_bytes"]
+                                        if totals["response_bytes"] else 1.0)
+        return stats
@@ -0,0 +1,88 @@
+import time
+from contextvars import ContextVar, copy_context
+from killb.exceptions import DeadlineExceededError
+
+_current_deadline = ContextVar("killb_deadline", default=None)
+
+
+class Deadline:
+    """
+        An end-to-end time budget shared by every API call made while it is active.
+
+        Use it as a context manager around a single call or a composite operation, such as creating a quotation and
+        then a ramp with it. Every request made inside the block, including token refreshes, retries and rate
+        limiter waits, is bounded by the time left, and raises DeadlineExceededError once the budget is spent.
+        Deadlines follow the current thread or asyncio task, and a nested deadline can only shorten the budget.
+
+        Example
+        -------
+        with Deadline(2.0):
+            quotation = client.Quotation.create(quotation_data)
+            ramp = client.Ramps.create({"quotationId": quotation["id"], "userId": user_id, "accountId": account_id})
+
+        Attributes
+        ----------
+        expires_at : float
+            The `time.monotonic()` value at which the budget runs out.
+
+        Methods
+        -------
+        remaining() -> float
+            Returns the number of seconds left, never less than zero.
+        expired() -> bool
+            Checks if the budget is spent.
+        check()
+            Raises DeadlineExceededError if the budget is spent.
+    """
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self._tokens = []
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceededError("Deadline exceeded")
+
+    def __enter__(self):
+        outer = _current_deadline.get()
+        if outer is not None and outer.expires_at < self.expires_at:
+            self.expires_at = outer.expires_at
+        self._tokens.append(_current_deadline.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_deadline.reset(self._tokens.pop())
+
+
+def current_deadline():
+    """
+        Returns the Deadline active in the current thread or task, if any.
+
+        Returns
+        -------
+        Deadline or None
+            The innermost active deadline.
+    """
+    return _current_deadline.get()
+
+
+def detached_context():
+    """
+        Returns a copy of the current context without an active deadline.
+
+        Background work started by a call, such as a stale-while-revalidate refresh, runs in it so that it is not
+        bounded by the budget of the call that happened to start it.
+
+        Returns
+        -------
+        contextvars.Context
+            A context to run the background work in.
+    """
+    context = copy_context()
+    context.run(_current_deadline.set, None)
+    return context
@@ -0,0 +1,39 @@
+_STATIC_SEGMENTS = {
+    "auth", "login", "accounts", "users", "quotations", "simulation", "ramps", "savings", "withdrawal",
+    "transactions", "balance", "deposit-instructions", "crypto-deposit-instructions",
+}
+
+
+def endpoint_path(endpoint: str) -> str:
+    """
+        Strips the query string and surrounding slashes from an endpoint.
+
+        Parameters
+        ----------
+        endpoint : str
+            An endpoint as passed to ApiRequests.request, e.g. `ramps?status=COMPLETED`.
+
+        Returns
+        -------
+        str
+            The endpoint path, e.g. `ramps`.
+    """
+    return endpoint.split("?", 1)[0].strip("/")
+
+
+def endpoint_template(endpoint: str) -> str:
+    """
+        Replaces the identifiers in an endpoint with `{id}`, so that calls to the same route share a key.
+
+        Parameters
+        ----------
+        endpoint : str
+            An endpoint as passed to ApiRequests.request, e.g. `savings/abc-123/balance`.
+
+        Returns
+        -------
+        str
+            The endpoint template, e.g. `savings/{id}/balance`.
+    """
+    segments = endpoint_path(endpoint).split("/")
+    return "/".join(segment if segment in _STATIC_SEGMENTS else "{id}" for segment in segments)
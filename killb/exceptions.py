@@ -1,6 +1,9 @@
 
 class KillBApiError(Exception):
-    pass
+    def __init__(self, *args, status_code=None, headers=None):
+        super().__init__(*args)
+        self.status_code = status_code
+        self.headers = headers or {}
 
 
 class AuthenticationError(KillBApiError):
@@ -9,3 +12,26 @@ class AuthenticationError(KillBApiError):
 
 class NotFoundError(KillBApiError):
     pass
+
+
+class RateLimitError(KillBApiError):
+    pass
+
+
+class NetworkError(KillBApiError):
+    pass
+
+
+class CircuitOpenError(KillBApiError):
+    def __init__(self, *args, endpoint=None, retry_after=None):
+        super().__init__(*args)
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(KillBApiError):
+    pass
+
+
+class CassetteError(KillBApiError):
+    pass
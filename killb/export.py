@@ -0,0 +1,324 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from killb.pagination import iter_pages
+
+CSV = "csv"
+PARQUET = "parquet"
+
+
+def record_time(value):
+    """
+        Returns a record timestamp as a Unix timestamp in seconds.
+
+        Parameters
+        ----------
+        value : str or int or float
+            An ISO 8601 string, or a Unix timestamp in seconds or milliseconds.
+
+        Returns
+        -------
+        float
+            The timestamp, or None when the value is missing.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return value / 1000 if value > 1e11 else float(value)
+
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return value
+
+
+def _write_json(path, data):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as checkpoint_file:
+        json.dump(data, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temp_path, path)
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("Parquet exports require pyarrow: `pip install killb-sdk-python[parquet]`") from error
+    return pyarrow
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+class _ParquetWriter:
+    def __init__(self, path, columns):
+        pyarrow = self._pyarrow = _pyarrow()
+        self._path = path
+        self._columns = columns
+        # Every column is a nullable string, like the cells of a CSV part: a schema inferred from the first row
+        # group would reject later ones where a field is first null, then set, or switches between int and float.
+        self._schema = pyarrow.schema([(column, pyarrow.string()) for column in columns])
+        self._writer = None
+
+    def write(self, rows):
+        if self._writer is None:
+            self._writer = self._pyarrow.parquet.ParquetWriter(self._path, self._schema)
+        rows = [{column: _text(row.get(column)) for column in self._columns} for row in rows]
+        self._writer.write_table(self._pyarrow.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        with open(self._path, "rb") as part_file:
+            os.fsync(part_file.fileno())
+
+
+_WRITERS = {CSV: _CsvWriter, PARQUET: _ParquetWriter}
+
+
+class IncrementalExport:
+    """
+        Exports the records of a paginated listing that are new or changed since the last run, to CSV or Parquet.
+
+        A checkpoint file keeps the cursor of the last export: the latest `updatedAt` (or `createdAt` when a record
+        has none) and the id of that record. Each run pages through the listing, keeps the records after the
+        cursor and streams them to a new part file, `<name>-<run>.csv` or `.parquet`, in row groups of
+        `batch_size`, so memory stays constant whatever the number of records. The columns are fixed by the first
+        row group; when a later record has a field that is not among them, the part is closed and the run goes on
+        in a new one, `<name>-<run>-2.csv`, whose columns include it, so no field is dropped.
+
+        A run commits in two steps: its parts are written to temporary files and flushed, the checkpoint is saved
+        with the new cursor and the names of the pending parts, and only then are the parts renamed into place. A
+        run that crashes before the checkpoint leaves the previous cursor, so the next run exports the same records
+        again; a crash after it is completed by the next run, which renames the pending parts. No part is lost or
+        written twice.
+
+        The listing endpoints have no `updatedAt` filter, so the whole listing is read on each run unless
+        `newest_first` is set, in which case paging stops at the first record that is not after the cursor. Records
+        updated while a run is paging could be skipped by a cursor taken from later records, so the cursor never
+        moves past `lag` seconds before the run started. Records inside that window are exported again by every
+        run until they leave it, so delivery is at least once: consumers should deduplicate by id and record time,
+        or keep the latest version of each id.
+
+        Example
+        -------
+        export = IncrementalExport(client.Savings.get_transactions, {"limit": 100}, "transactions",
+                                   directory="exports", name="transactions", format="parquet")
+        summary = export.run()
+
+        Attributes
+        ----------
+        fetch : callable
+            Returns one page for a query, e.g. `client.Savings.get_transactions` or `client.Ramps.get_by_query`.
+        query : dict
+            The query of the listing; `limit` sets the page size.
+        key : str
+            The field holding the records in each page, e.g. `transactions` or `ramps`.
+        directory : str
+            The directory of the part files and, by default, of the checkpoint.
+        name : str
+            The prefix of the part files (default `key`).
+        format : str
+            `csv` (default) or `parquet`. Parquet requires pyarrow.
+        checkpoint : str
+            The checkpoint file (default `<directory>/<name>.checkpoint.json`).
+        columns : list
+            The columns written; other fields are left out. By default, the columns of the previous run followed by
+            the fields of the records, a new field starting a new part. Nested values are written as JSON, and
+            Parquet columns are strings.
+        batch_size : int
+            The number of records per row group (default 1000).
+        time_fields : tuple
+            The fields holding the record time, in order of preference (default `updatedAt`, then `createdAt`).
+        newest_first : bool
+            Whether the listing returns the most recently updated records first (default False).
+        lag : float
+            How many seconds before the start of a run the cursor may reach at most (default 60).
+        workers : int
+            The number of pages fetched concurrently when `newest_first` is not set (default 1).
+
+        Methods
+        -------
+        run() -> dict
+            Exports the new and changed records and returns the number of records, the first part written (or
+            None), all the parts written and the new cursor.
+        cursor() -> dict
+            Returns the committed cursor, or None before the first run.
+    """
+    def __init__(self, fetch, query: dict, key: str, directory: str, name: str = None, format: str = CSV,
+                 checkpoint: str = None, columns: list = None, batch_size: int = 1000,
+                 time_fields: tuple = ("updatedAt", "createdAt"), newest_first: bool = False, lag: float = 60,
+                 workers: int = 1):
+        if format not in _WRITERS:
+            raise ValueError(f"Unknown export format {format!r}, expected one of {sorted(_WRITERS)}")
+        if format == PARQUET:
+            _pyarrow()
+        self.fetch = fetch
+        self.query = dict(query)
+        self.key = key
+        self.directory = directory
+        self.name = name or key
+        self.format = format
+        self.checkpoint = checkpoint or os.path.join(directory, f"{self.name}.checkpoint.json")
+        self.columns = list(columns) if columns else None
+        self.batch_size = batch_size
+        self.time_fields = tuple(time_fields)
+        self.newest_first = newest_first
+        self.lag = lag
+        self.workers = workers
+
+    def _load(self):
+        try:
+            with open(self.checkpoint) as checkpoint_file:
+                return json.load(checkpoint_file)
+        except FileNotFoundError:
+            return {"cursor": None, "run": 0, "pending": None, "columns": None}
+
+    def _part_path(self, run, number=1):
+        suffix = f"-{number}" if number > 1 else ""
+        return os.path.join(self.directory, f"{self.name}-{run:06d}{suffix}.{self.format}")
+
+    def _recover(self, state):
+        """
+            Completes a run that crashed after saving its checkpoint but before renaming its part.
+        """
+        pending = state.get("pending")
+        if not pending:
+            return state
+        for part_path in [pending] if isinstance(pending, str) else pending:
+            temp_path = f"{part_path}.tmp"
+            if os.path.exists(temp_path):
+                os.replace(temp_path, part_path)
+        state = {**state, "pending": None}
+        _write_json(self.checkpoint, state)
+        return state
+
+    def cursor(self):
+        return self._load()["cursor"]
+
+    def _record_key(self, record):
+        for field in self.time_fields:
+            timestamp = record_time(record.get(field))
+            if timestamp is not None:
+                return timestamp, str(record.get("id", ""))
+        return None
+
+    def _changed(self, floor):
+        """
+            Yields `(key, record)` for every record after the cursor.
+        """
+        if self.newest_first:
+            records = iter_pages(self.fetch, self.query, self.key)
+        else:
+            records = iter_pages(self.fetch, self.query, self.key, workers=self.workers, ordered=False)
+        try:
+            for record in records:
+                record_key = self._record_key(record)
+                if record_key is None:
+                    continue
+                if floor is not None and record_key <= floor:
+                    if self.newest_first:
+                        return
+                    continue
+                yield record_key, record
+        finally:
+            records.close()
+
+    def run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        state = self._recover(self._load())
+        cursor = state["cursor"]
+        floor = (cursor["time"], cursor["id"]) if cursor else None
+        started = time.time()
+        run = state["run"] + 1
+
+        writer = None
+        columns = state.get("columns")
+        parts = []
+        count = 0
+        newest = floor
+
+        def write(batch):
+            nonlocal writer, columns, count
+            if self.columns:
+                batch = [{column: row.get(column) for column in self.columns} for row in batch]
+            batch_columns = self.columns or _columns(batch, columns)
+            if writer is not None and len(batch_columns) > len(columns):
+                # A field the part has no column for: close it and go on in a new part rather than drop the field.
+                writer.close()
+                writer = None
+            if writer is None:
+                columns = batch_columns
+                parts.append(self._part_path(run, len(parts) + 1))
+                writer = _WRITERS[self.format](f"{parts[-1]}.tmp", columns)
+            writer.write(batch)
+            count += len(batch)
+
+        batch = []
+        try:
+            for record_key, record in self._changed(floor):
+                newest = record_key if newest is None or record_key > newest else newest
+                batch.append({field: _cell(value) for field, value in record.items()})
+                if len(batch) >= self.batch_size:
+                    write(batch)
+                    batch = []
+            if batch:
+                write(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if not count:
+            return {"records": 0, "part": None, "parts": [], "cursor": cursor}
+
+        # Records updated while the run was paging may have been missed, so the cursor stays behind the start of
+        # the run and the next one reads them again.
+        limit = (started - self.lag, "")
+        newest = min(newest, limit)
+        if floor is not None:
+            newest = max(newest, floor)
+        state = {"cursor": {"time": newest[0], "id": newest[1]}, "run": run, "pending": parts, "columns": columns}
+        _write_json(self.checkpoint, state)
+        for part_path in parts:
+            os.replace(f"{part_path}.tmp", part_path)
+        _write_json(self.checkpoint, {**state, "pending": None})
+        return {"records": count, "part": parts[0], "parts": parts, "cursor": state["cursor"]}
+
+
+def _columns(rows, columns=None):
+    """
+        Returns the given columns followed by the fields of the rows that are not among them yet.
+    """
+    columns = dict.fromkeys(columns or ())
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
@@ -0,0 +1,136 @@
+import threading
+from collections import deque
+from killb.endpoints import endpoint_template
+
+
+class _Hedges:
+    def __init__(self, window_size):
+        self.latencies = deque(maxlen=window_size)
+        self.requests = 0
+        self.issued = 0
+        self.won = 0
+        # The percentile is cached and only recomputed once `window_size / 20` new latencies came in.
+        self.delay = None
+        self.unsorted = 0
+
+
+class HedgePolicy:
+    """
+        Sends a duplicate of a slow read and keeps whichever response arrives first.
+
+        A call is hedged when its method is in `methods` and, if `endpoints` is set, its endpoint template is listed
+        there. When the first attempt has not answered after the `percentile`-th percentile of the template's recent
+        latencies (clamped between `min_delay` and `max_delay`, and `initial_delay` until `min_samples` latencies
+        are known), a second attempt is sent. The first response wins and the other attempt is cancelled: async
+        attempts are cancelled outright, sync ones are abandoned and their response discarded.
+
+        Hedges are capped by a budget: every call earns `budget` hedges, e.g. 0.05 for at most 5% extra requests,
+        with up to `budget_burst` hedges saved up.
+
+        Attributes
+        ----------
+        percentile : float
+            The latency percentile after which a hedge is sent (default 95).
+        initial_delay : float
+            The hedge delay in seconds until enough latencies are known (default 1).
+        min_delay : float
+            The shortest hedge delay in seconds (default 0.01).
+        max_delay : float
+            The longest hedge delay in seconds (default 5).
+        min_samples : int
+            The number of latencies needed before the percentile is used (default 20).
+        window_size : int
+            The number of recent latencies kept per endpoint template (default 200).
+        budget : float
+            The hedges earned per call (default 0.05).
+        budget_burst : float
+            The most hedges that can be saved up (default 10).
+        methods : tuple
+            The HTTP methods that may be hedged (default `("GET",)`). Only list idempotent methods.
+        endpoints : set
+            The endpoint templates that may be hedged, e.g. `{"accounts/{id}", "savings/{id}/balance", "ramps"}`
+            (default: every endpoint).
+
+        Methods
+        -------
+        delay(method: str, endpoint: str) -> float
+            Returns how long to wait before hedging the call, or None when it must not be hedged.
+        record_latency(endpoint: str, seconds: float)
+            Adds the latency of a successful attempt to the template's window.
+        acquire(endpoint: str) -> bool
+            Spends one hedge from the budget, if any is left.
+        record_hedge(endpoint: str, won: bool)
+            Counts a hedge and whether its response was used.
+        stats() -> dict
+            Returns the calls, hedges issued, hedges won and current delay per endpoint template.
+    """
+    def __init__(self, percentile: float = 95, initial_delay: float = 1, min_delay: float = 0.01,
+                 max_delay: float = 5, min_samples: int = 20, window_size: int = 200, budget: float = 0.05,
+                 budget_burst: float = 10, methods: tuple = ("GET",), endpoints: set = None):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.window_size = window_size
+        self.budget = budget
+        self.budget_burst = budget_burst
+        self.methods = tuple(method.upper() for method in methods)
+        self.endpoints = set(endpoints) if endpoints is not None else None
+        self._tokens = budget_burst
+        self._hedges = {}
+        self._lock = threading.Lock()
+
+    def _template_hedges(self, template):
+        # Callers hold self._lock.
+        hedges = self._hedges.get(template)
+        if hedges is None:
+            hedges = self._hedges[template] = _Hedges(self.window_size)
+        return hedges
+
+    def _delay(self, hedges):
+        if len(hedges.latencies) < self.min_samples:
+            return self.initial_delay
+        if hedges.delay is None or hedges.unsorted >= max(self.window_size // 20, 1):
+            latencies = sorted(hedges.latencies)
+            index = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+            hedges.delay = min(max(latencies[index], self.min_delay), self.max_delay)
+            hedges.unsorted = 0
+        return hedges.delay
+
+    def delay(self, method, endpoint):
+        if method.upper() not in self.methods:
+            return None
+        template = endpoint_template(endpoint)
+        if self.endpoints is not None and template not in self.endpoints:
+            return None
+        with self._lock:
+            hedges = self._template_hedges(template)
+            hedges.requests += 1
+            self._tokens = min(self._tokens + self.budget, self.budget_burst)
+            return self._delay(hedges)
+
+    def record_latency(self, endpoint, seconds):
+        with self._lock:
+            hedges = self._template_hedges(endpoint_template(endpoint))
+            hedges.latencies.append(seconds)
+            hedges.unsorted += 1
+
+    def acquire(self, endpoint):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def record_hedge(self, endpoint, won):
+        with self._lock:
+            hedges = self._template_hedges(endpoint_template(endpoint))
+            hedges.issued += 1
+            hedges.won += bool(won)
+
+    def stats(self):
+        with self._lock:
+            return {template: {"calls": hedges.requests, "hedges_issued": hedges.issued, "hedges_won": hedges.won,
+                               "delay": self._delay(hedges)}
+                    for template, hedges in self._hedges.items()}
@@ -0,0 +1,378 @@
+import json
+import queue
+import sqlite3
+import threading
+from killb.endpoints import endpoint_template
+from killb.pagination import page_records
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY, email TEXT, external_id TEXT, type TEXT, active INTEGER, created_at TEXT, updated_at TEXT,
+    record TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS users_email ON users (email COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS users_external_id ON users (external_id);
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY, user_id TEXT, type TEXT, status TEXT, external_id TEXT, created_at TEXT, updated_at TEXT,
+    record TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS accounts_user_id ON accounts (user_id, type);
+CREATE INDEX IF NOT EXISTS accounts_external_id ON accounts (external_id);
+CREATE TABLE IF NOT EXISTS ramps (
+    id TEXT PRIMARY KEY, user_id TEXT, account_id TEXT, quotation_id TEXT, status TEXT, external_id TEXT,
+    created_at TEXT, updated_at TEXT, record TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS ramps_user_id ON ramps (user_id, status, created_at);
+CREATE INDEX IF NOT EXISTS ramps_status ON ramps (status, created_at);
+CREATE INDEX IF NOT EXISTS ramps_account_id ON ramps (account_id);
+CREATE INDEX IF NOT EXISTS ramps_external_id ON ramps (external_id);
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY, user_id TEXT, origin_account_id TEXT, destination_account_id TEXT, type TEXT,
+    created_at TEXT, updated_at TEXT, record TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS transactions_user_id ON transactions (user_id, created_at);
+CREATE INDEX IF NOT EXISTS transactions_origin ON transactions (origin_account_id);
+CREATE INDEX IF NOT EXISTS transactions_destination ON transactions (destination_account_id);
+"""
+
+
+def _user_email(user):
+    return (user.get("data") or {}).get("email")
+
+
+# For each table: the API field (or a function of the record) stored in each indexed column.
+_COLUMNS = {
+    "users": {"email": _user_email, "external_id": "externalId", "type": "type", "active": "active",
+              "created_at": "createdAt", "updated_at": "updatedAt"},
+    "accounts": {"user_id": "userId", "type": "type", "status": "status", "external_id": "externalId",
+                 "created_at": "createdAt", "updated_at": "updatedAt"},
+    "ramps": {"user_id": "userId", "account_id": "accountId", "quotation_id": "quotationId", "status": "status",
+              "external_id": "externalId", "created_at": "createdAt", "updated_at": "updatedAt"},
+    "transactions": {"user_id": "userId", "origin_account_id": "originAccountId",
+                     "destination_account_id": "destinationAccountId", "type": "type", "created_at": "createdAt",
+                     "updated_at": "updatedAt"},
+}
+
+# The filters accepted by `find`, by API field name, and the column each one reads.
+_FILTERS = {table: {"id": "id", **{field: column for column, field in columns.items() if isinstance(field, str)}}
+            for table, columns in _COLUMNS.items()}
+_FILTERS["users"]["email"] = "email"
+
+# The table fed by the responses of each route. Pages hold their records under the table's name.
+_ROUTES = {
+    ("POST", "users"): "users",
+    ("PATCH", "users/{id}"): "users",
+    ("GET", "users"): "users",
+    ("POST", "accounts"): "accounts",
+    ("PATCH", "accounts/{id}"): "accounts",
+    ("GET", "accounts/{id}"): "accounts",
+    ("POST", "ramps"): "ramps",
+    ("GET", "ramps"): "ramps",
+    ("GET", "savings/transactions"): "transactions",
+}
+
+
+def _value(record, field):
+    value = field(record) if callable(field) else record.get(field)
+    if hasattr(value, "value"):
+        value = value.value
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+class LocalMirror:
+    """
+        Keeps users, accounts, ramps and transactions in an indexed SQLite database for local lookups.
+
+        Attached to a client with `mirror=`, it is fed by the responses of the client's own calls: creates, updates,
+        lookups by id and every page of `get_by_query`, `iter_by_query` and `get_transactions`. `sync` pages through
+        the listings to fill in what the client has not seen, and `start` runs it periodically on a background
+        thread. A record is only replaced by a version whose `updatedAt` is not older, so a late page cannot
+        overwrite a fresher update.
+
+        Queries such as "all ramps for user X in status Y" or "the user with this email" are then answered from the
+        indexes in microseconds, without a round trip. The mirror is as fresh as its last response or sync.
+
+        `observe` only queues the records of a response: a background thread writes them to SQLite, several responses
+        per transaction, so a request (or the event loop of an AsyncClient) never waits on the database. Lookups
+        first wait for the queued records, so a record is found as soon as the call that returned it is done. When
+        more than `queue_size` responses are waiting, new ones are dropped and counted in `errors`.
+
+        `sync` and `start` page through the listings with the blocking resource methods and `client.map`, so they
+        take a Client; an AsyncClient can still feed the mirror through `mirror=`.
+
+        Example
+        -------
+        mirror = LocalMirror("killb-mirror.db")
+        client = Client("SANDBOX", email, password, mirror=mirror)
+        mirror.sync(client)
+        mirror.find("ramps", userId=user_id, status="COMPLETED")
+        mirror.user_by_email("jane@example.com")
+
+        Attributes
+        ----------
+        path : str
+            The SQLite database file, or `:memory:` (the default) for a mirror that lives as long as the process.
+        queue_size : int
+            The most responses waiting to be written (default 10000).
+        errors : int
+            The number of responses that could not be stored or were dropped. Storage errors never fail the API call.
+
+        Methods
+        -------
+        observe(method: str, endpoint: str, result)
+            Queues the records of an API response to be stored. Called by ApiRequests for every response.
+        flush()
+            Waits until every queued response is stored.
+        upsert(table: str, records: list) -> int
+            Stores records in a table and returns the number written.
+        get(table: str, record_id: str) -> dict
+            Returns a record by id, or None.
+        find(table: str, limit: int = None, **filters) -> list[dict]
+            Returns the records matching every filter, by API field name, newest first.
+        user_by_email(email: str) -> dict
+            Returns the user with this email, ignoring case, or None.
+        count(table: str) -> int
+            Returns the number of records in a table.
+        sync(client: Client, tables: tuple = ("users", "accounts", "ramps", "transactions"),
+             page_size: int = 100) -> dict
+            Pages through the listings of the tables and returns the number of records read per table. Requires a
+            Client, not an AsyncClient.
+        start(client: Client, interval: float = 300)
+            Runs `sync` every `interval` seconds on a background thread.
+        stop()
+            Stops the background thread.
+        close()
+            Stores the queued responses and closes the database.
+    """
+    def __init__(self, path: str = ":memory:", queue_size: int = 10000):
+        self.path = path
+        self.queue_size = queue_size
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._upserts = {table: self._upsert_statement(table, columns) for table, columns in _COLUMNS.items()}
+        self._stopped = threading.Event()
+        self._thread = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    @staticmethod
+    def _upsert_statement(table, columns):
+        names = ["id", *columns, "record"]
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names[1:])
+        return (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+                f"ON CONFLICT (id) DO UPDATE SET {updates} "
+                f"WHERE excluded.updated_at IS NULL OR {table}.updated_at IS NULL "
+                f"OR excluded.updated_at >= {table}.updated_at")
+
+    def _upsert_rows(self, table, records):
+        columns = _COLUMNS[self._table(table)].values()
+        return [(str(record["id"]), *(_value(record, field) for field in columns),
+                 json.dumps(record, separators=(",", ":"), default=str))
+                for record in records if isinstance(record, dict) and record.get("id") is not None]
+
+    def _write(self, batches):
+        """
+            Writes `(table, rows)` batches in a single transaction, in order.
+        """
+        with self._lock:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                for table, rows in batches:
+                    self._connection.executemany(self._upserts[table], rows)
+
+    def upsert(self, table: str, records):
+        rows = self._upsert_rows(table, records)
+        if not rows:
+            return 0
+        # One transaction per batch: a page of 100 records costs a single commit.
+        self._write([(table, rows)])
+        return len(rows)
+
+    def observe(self, method: str, endpoint: str, result):
+        table = _ROUTES.get((method.upper(), endpoint_template(endpoint)))
+        if table is None or result is None:
+            return
+        if isinstance(result, dict) and "id" in result:
+            records = [result]
+        else:
+            records = page_records(result, table)
+        self._start_writer()
+        try:
+            self._queue.put_nowait((table, records))
+        except queue.Full:
+            self.errors += 1
+
+    def _start_writer(self):
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._drain, daemon=True, name="killb-mirror-writer")
+                    self._writer.start()
+
+    def _drain(self):
+        """
+            Stores queued responses until `close`, writing everything queued at once in one transaction.
+        """
+        while True:
+            items = [self._queue.get()]
+            while len(items) < 100:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = items[-1] is None
+            batches = [item for item in items if item is not None]
+            try:
+                rows = [(table, self._upsert_rows(table, records)) for table, records in batches]
+                rows = [(table, table_rows) for table, table_rows in rows if table_rows]
+                if rows:
+                    self._write(rows)
+            except Exception:
+                self.errors += len(batches)
+            for _ in items:
+                self._queue.task_done()
+            if closing:
+                return
+
+    def flush(self):
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def _rows(self, sql, parameters=()):
+        self.flush()
+        with self._lock:
+            return [json.loads(row[0]) for row in self._connection.execute(sql, parameters)]
+
+    @staticmethod
+    def _table(table):
+        if table not in _COLUMNS:
+            raise ValueError(f"Unknown table {table!r}, expected one of {sorted(_COLUMNS)}")
+        return table
+
+    def get(self, table: str, record_id: str):
+        self._table(table)
+        rows = self._rows(f"SELECT record FROM {table} WHERE id = ?", (str(record_id),))
+        return rows[0] if rows else None
+
+    def find(self, table: str, limit: int = None, **filters):
+        allowed = _FILTERS[self._table(table)]
+        clauses = []
+        parameters = []
+        for field, value in filters.items():
+            if field not in allowed:
+                raise ValueError(f"Cannot filter {table} on {field!r}, expected one of {sorted(allowed)}")
+            if hasattr(value, "value"):
+                value = value.value
+            clauses.append(f"{allowed[field]} = ?")
+            parameters.append(int(value) if isinstance(value, bool) else value)
+        sql = f"SELECT record FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return self._rows(sql, parameters)
+
+    def user_by_email(self, email: str):
+        rows = self._rows("SELECT record FROM users WHERE email = ? COLLATE NOCASE LIMIT 1", (email,))
+        return rows[0] if rows else None
+
+    def count(self, table: str):
+        self._table(table)
+        self.flush()
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _feeds(self, client):
+        return getattr(client.api_requests, "mirror", None) is self
+
+    def _store(self, client, table, records, batch_size=500):
+        """
+            Drains the records of a listing, storing them in batches unless the client already feeds the mirror.
+        """
+        fed = self._feeds(client)
+        count = 0
+        batch = []
+        for record in records:
+            count += 1
+            if fed:
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self.upsert(table, batch)
+                batch = []
+        self.upsert(table, batch)
+        return count
+
+    @staticmethod
+    def _require_client(client):
+        import inspect
+
+        if inspect.iscoroutinefunction(client.map):
+            raise TypeError("LocalMirror.sync requires a Client; an AsyncClient can only feed the mirror with mirror=")
+
+    def sync(self, client, tables: tuple = ("users", "accounts", "ramps", "transactions"), page_size: int = 100):
+        self._require_client(client)
+        counts = {}
+        query = {"limit": page_size}
+        if "users" in tables:
+            counts["users"] = self._store(client, "users", client.User.iter_by_query(query))
+        if "accounts" in tables:
+            # Accounts have no listing, so they are read per user, concurrently.
+            self.flush()
+            with self._lock:
+                user_ids = [row[0] for row in self._connection.execute("SELECT id FROM users")]
+            results = client.map(client.Account.get_by_user, user_ids)
+            accounts = []
+            for result in results:
+                if result.ok:
+                    accounts.extend([result.result] if isinstance(result.result, dict) and "id" in result.result
+                                    else page_records(result.result, "accounts"))
+            counts["accounts"] = self._store(client, "accounts", accounts)
+        if "ramps" in tables:
+            counts["ramps"] = self._store(client, "ramps", client.Ramps.iter_by_query(query))
+        if "transactions" in tables:
+            counts["transactions"] = self._store(client, "transactions", client.Savings.iter_transactions(query))
+        return counts
+
+    def _run(self, client, interval):
+        while not self._stopped.is_set():
+            try:
+                self.sync(client)
+            except Exception:
+                self.errors += 1
+            self._stopped.wait(interval)
+
+    def start(self, client, interval: float = 300):
+        self._require_client(client)
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, args=(client, interval), daemon=True,
+                                            name="killb-mirror-sync")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,256 @@
+import contextvars
+
+
+def page_records(page, key: str):
+    """
+        Returns the records of one page of a paginated response.
+
+        Parameters
+        ----------
+        page : dict or list
+            A page as returned by e.g. `Ramps.get_by_query`.
+        key : str
+            The field holding the records, e.g. `ramps`. When it is missing, the first list in the page is used.
+
+        Returns
+        -------
+        list
+            The records of the page.
+    """
+    if isinstance(page, list):
+        return page
+    if not isinstance(page, dict):
+        return []
+    records = page.get(key)
+    if records is None:
+        records = next((value for value in page.values() if isinstance(value, list)), [])
+    return records
+
+
+def _next_query(query, page, records):
+    """
+        Returns the query for the page after `page`, or None when it was the last one.
+    """
+    number = query.get("page") or 1
+    total = page.get("totalPage") if isinstance(page, dict) else None
+    if not records or (total is not None and number >= total):
+        return None
+    if total is None and query.get("limit") and len(records) < query["limit"]:
+        return None
+    return {**query, "page": number + 1}
+
+
+def _first_page(query):
+    return {**query, "page": query.get("page") or 1}
+
+
+def _remaining_queries(query, page, records):
+    """
+        Returns the queries of every page after the first one, or None when `totalPage` is unknown.
+    """
+    total = page.get("totalPage") if isinstance(page, dict) else None
+    if total is None:
+        return None
+    return [{**query, "page": number} for number in range(query["page"] + 1, total + 1)] if records else []
+
+
+def iter_pages(fetch, query: dict, key: str, prefetch: bool = True, workers: int = 1, ordered: bool = True):
+    """
+        Yields the records of every page of a paginated query, fetching the next page in the background.
+
+        While the caller processes a page, the next one is already being fetched on a worker thread, so network
+        time and processing time overlap. Pages are read until `totalPage` is reached or a page comes back empty.
+
+        With `workers` above 1 the query is fanned out for bulk listings: `totalPage` is read from the first page
+        and the remaining pages are fetched by up to `workers` threads at once, with at most twice as many pages
+        held in memory. Every request still goes through the client, so a configured rate limiter paces them.
+
+        Parameters
+        ----------
+        fetch : callable
+            Returns one page for a query, e.g. `client.Ramps.get_by_query`.
+        query : dict
+            The query of the first page. `page` defaults to 1.
+        key : str
+            The field holding the records in each page, e.g. `ramps`.
+        prefetch : bool, optional
+            Whether the next page is fetched while the current one is consumed (default True).
+        workers : int, optional
+            The number of pages fetched concurrently (default 1, i.e. one page ahead).
+        ordered : bool, optional
+            Whether records of a fan-out are yielded in page order (default True). Otherwise each page is yielded
+            as soon as it arrives.
+
+        Yields
+        ------
+        dict
+            One record at a time.
+    """
+    if workers > 1:
+        yield from _fan_out(fetch, _first_page(query), key, workers, ordered)
+        return
+
+    query = _first_page(query)
+    executor = None
+    upcoming = None
+    try:
+        page = fetch(query)
+        while True:
+            records = page_records(page, key)
+            next_query = _next_query(query, page, records)
+            if next_query is not None and prefetch:
+                if executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="killb-prefetch")
+                upcoming = executor.submit(contextvars.copy_context().run, fetch, next_query)
+            yield from records
+            if next_query is None:
+                return
+            page = upcoming.result() if prefetch else fetch(next_query)
+            upcoming = None
+            query = next_query
+    finally:
+        if upcoming is not None:
+            upcoming.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def _fan_out(fetch, query, key, workers, ordered):
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    page = fetch(query)
+    records = page_records(page, key)
+    queries = _remaining_queries(query, page, records)
+    if queries is None:
+        # Without totalPage the page count is unknown, so pages are read one after the other.
+        yield from records
+        next_query = _next_query(query, page, records)
+        if next_query is not None:
+            yield from iter_pages(fetch, next_query, key)
+        return
+
+    yield from records
+    queries = iter(queries)
+    in_flight = []
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="killb-fan-out")
+
+    def submit():
+        for next_query in queries:
+            in_flight.append(executor.submit(contextvars.copy_context().run, fetch, next_query))
+            return
+
+    try:
+        for _ in range(workers * 2):
+            submit()
+        while in_flight:
+            if ordered:
+                done = in_flight.pop(0)
+            else:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                done = next(future for future in in_flight if future in finished)
+                in_flight.remove(done)
+            page = done.result()
+            submit()
+            yield from page_records(page, key)
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def aiter_pages(fetch, query: dict, key: str, prefetch: bool = True, workers: int = 1, ordered: bool = True):
+    """
+        asyncio counterpart of iter_pages: the next page is fetched by a task while the current one is consumed,
+        and with `workers` above 1 up to `workers` pages are fetched concurrently.
+
+        Parameters
+        ----------
+        fetch : callable
+            Coroutine function returning one page for a query, e.g. `client.Ramps.get_by_query` on an AsyncClient.
+        query : dict
+            The query of the first page. `page` defaults to 1.
+        key : str
+            The field holding the records in each page, e.g. `ramps`.
+        prefetch : bool, optional
+            Whether the next page is fetched while the current one is consumed (default True).
+        workers : int, optional
+            The number of pages fetched concurrently (default 1, i.e. one page ahead).
+        ordered : bool, optional
+            Whether records of a fan-out are yielded in page order (default True).
+
+        Yields
+        ------
+        dict
+            One record at a time.
+    """
+    import asyncio
+
+    if workers > 1:
+        async for record in _afan_out(fetch, _first_page(query), key, workers, ordered):
+            yield record
+        return
+
+    query = _first_page(query)
+    upcoming = None
+    try:
+        page = await fetch(query)
+        while True:
+            records = page_records(page, key)
+            next_query = _next_query(query, page, records)
+            if next_query is not None and prefetch:
+                upcoming = asyncio.ensure_future(fetch(next_query))
+            for record in records:
+                yield record
+            if next_query is None:
+                return
+            page = await upcoming if prefetch else await fetch(next_query)
+            upcoming = None
+            query = next_query
+    finally:
+        if upcoming is not None:
+            upcoming.cancel()
+
+
+async def _afan_out(fetch, query, key, workers, ordered):
+    import asyncio
+
+    page = await fetch(query)
+    records = page_records(page, key)
+    queries = _remaining_queries(query, page, records)
+    if queries is None:
+        for record in records:
+            yield record
+        next_query = _next_query(query, page, records)
+        if next_query is not None:
+            async for record in aiter_pages(fetch, next_query, key):
+                yield record
+        return
+
+    for record in records:
+        yield record
+    queries = iter(queries)
+    in_flight = []
+
+    def submit():
+        for next_query in queries:
+            in_flight.append(asyncio.ensure_future(fetch(next_query)))
+            return
+
+    try:
+        for _ in range(workers):
+            submit()
+        while in_flight:
+            if ordered:
+                done = in_flight.pop(0)
+            else:
+                finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                done = next(task for task in in_flight if task in finished)
+                in_flight.remove(done)
+            page = await done
+            submit()
+            for record in page_records(page, key):
+                yield record
+    finally:
+        for task in in_flight:
+            task.cancel()
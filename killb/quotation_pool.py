@@ -0,0 +1,299 @@
+import threading
+import time
+import warnings
+from collections import deque
+from datetime import datetime
+from killb.simulation_cache import normalize_quotation
+
+
+def quotation_expires_at(quotation):
+    """
+        Returns when a quotation expires, as a Unix timestamp in seconds.
+
+        Parameters
+        ----------
+        quotation : CreateQuotationResponse
+            A quotation whose `expiresAt` is a Unix timestamp in seconds or milliseconds, or an ISO 8601 string.
+
+        Returns
+        -------
+        float
+            The expiry time, or 0 when the quotation has none.
+    """
+    expires_at = quotation.get("expiresAt")
+    if expires_at is None:
+        return 0.0
+    if isinstance(expires_at, str):
+        try:
+            expires_at = float(expires_at)
+        except ValueError:
+            return datetime.fromisoformat(expires_at.replace("Z", "+00:00")).timestamp()
+    # Timestamps this large are in milliseconds.
+    return expires_at / 1000 if expires_at > 1e11 else float(expires_at)
+
+
+def _key(data):
+    return tuple(sorted(normalize_quotation(data).items()))
+
+
+class QuotationPool:
+    """
+        Keeps live quotations pre-created for a set of corridors, so that a ramp can be created in one round trip.
+
+        Each corridor is a CreateQuotation, e.g. MXN to USDC over SPEI for an amount tier of 1000. A background
+        thread keeps `size` quotations per corridor, tracks their `expiresAt` and replaces each one
+        `rotate_before` seconds before it expires. `take` hands out a pooled quotation instantly, removing it from
+        the pool since a quotation backs a single ramp, and wakes the thread to replace it. Corridors that are not
+        configured, or whose pool is empty, get a quotation created on the spot.
+
+        A quotation that lives `2 * rotate_before` seconds or less is rotated halfway through its lifetime instead,
+        so short-lived quotations can still be pooled. A corridor whose quotations come without `expiresAt`, or
+        already expired, cannot be pooled: it is counted as an error, a RuntimeWarning is issued and the corridor is
+        no longer refilled, so `take` creates its quotations on the spot.
+
+        Example
+        -------
+        pool = QuotationPool(client.Quotation, [
+            {"fromCurrency": FromCurrency.MXN, "toCurrency": ToCurrency.USDC, "amount": 1000,
+             "cashInMethod": CashInMethod.SPEI, "cashOutMethod": CashOutMethod.POLYGON},
+        ])
+        with pool:
+            quotation = pool.take(corridor)
+            ramp = client.Ramps.create({"quotationId": quotation["id"], "userId": user_id, "accountId": account_id})
+
+        Attributes
+        ----------
+        quotation : Quotation
+            The resource quotations are created with.
+        corridors : list
+            The CreateQuotation requests to keep quotations for.
+        size : int
+            The number of live quotations kept per corridor (default 1).
+        rotate_before : float
+            How many seconds before `expiresAt` a quotation is replaced and no longer handed out (default 10), at
+            most half of the quotation's lifetime.
+        retry_interval : float
+            How many seconds to wait after a failed creation before trying again (default 5).
+
+        Methods
+        -------
+        start()
+            Starts the background thread.
+        stop()
+            Stops the background thread.
+        take(data: CreateQuotation) -> CreateQuotationResponse
+            Returns a live quotation for the corridor, from the pool when possible.
+        available(data: CreateQuotation) -> int
+            Returns the number of live quotations pooled for the corridor.
+        stats() -> dict
+            Returns the quotations created, handed out from the pool, created on the spot, expired unused, and the
+            creation errors and quotations that could not be pooled as they are.
+    """
+    def __init__(self, quotation, corridors: list, size: int = 1, rotate_before: float = 10,
+                 retry_interval: float = 5):
+        self.quotation = quotation
+        self.corridors = list(corridors)
+        self.size = size
+        self.rotate_before = rotate_before
+        self.retry_interval = retry_interval
+        # Each pool holds (rotate_at, quotation) pairs, oldest first.
+        self._pools = {_key(corridor): deque() for corridor in self.corridors}
+        self._unpooled = set()
+        self._clamped = set()
+        self._counters = {"created": 0, "pooled": 0, "on_demand": 0, "rotated": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _prune(self, now):
+        # Callers hold self._lock.
+        for pool in self._pools.values():
+            while pool and pool[0][0] <= now:
+                pool.popleft()
+                self._counters["rotated"] += 1
+
+    def _missing(self):
+        """
+            Drops quotations about to expire and returns the corridors that are short of quotations.
+        """
+        with self._lock:
+            self._prune(time.time())
+            missing = []
+            for corridor in self.corridors:
+                if _key(corridor) in self._unpooled:
+                    continue
+                missing.extend([corridor] * (self.size - len(self._pools[_key(corridor)])))
+            return missing
+
+    def _add(self, corridor, quotation):
+        now = time.time()
+        key = _key(corridor)
+        lifetime = quotation_expires_at(quotation) - now
+        with self._lock:
+            self._counters["created"] += 1
+            if lifetime <= 0:
+                # Without a usable expiry every new quotation would be thrown away: stop refilling the corridor.
+                self._counters["errors"] += 1
+                self._unpooled.add(key)
+                message = (f"Quotations for corridor {dict(key)} have no future expiresAt and cannot be pooled; "
+                           "they are created on demand instead")
+            elif lifetime <= 2 * self.rotate_before and key not in self._clamped:
+                self._counters["errors"] += 1
+                self._clamped.add(key)
+                message = (f"Quotations for corridor {dict(key)} live {lifetime:.0f} s, not more than twice "
+                           f"rotate_before ({self.rotate_before} s); they are rotated halfway through their lifetime")
+            else:
+                message = None
+            if lifetime > 0:
+                self._pools[key].append((now + lifetime - min(self.rotate_before, lifetime / 2), quotation))
+        if message is not None:
+            warnings.warn(message, RuntimeWarning, stacklevel=2)
+
+    def _failed(self):
+        with self._lock:
+            self._counters["errors"] += 1
+
+    def _next_wake(self):
+        """
+            Returns how many seconds until the next pooled quotation has to be rotated.
+        """
+        with self._lock:
+            rotations = [pool[0][0] for pool in self._pools.values() if pool]
+        if not rotations:
+            return self.retry_interval
+        return max(min(rotations) - time.time(), 0)
+
+    def _pop(self, data):
+        with self._lock:
+            pool = self._pools.get(_key(data))
+            if pool is None:
+                return None
+            self._prune(time.time())
+            if not pool:
+                return None
+            self._counters["pooled"] += 1
+            return pool.popleft()[1]
+
+    def take(self, data):
+        quotation = self._pop(data)
+        self._wake.set()
+        if quotation is not None:
+            return quotation
+        with self._lock:
+            self._counters["on_demand"] += 1
+        return self.quotation.create(data)
+
+    def available(self, data):
+        with self._lock:
+            self._prune(time.time())
+            return len(self._pools.get(_key(data), ()))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            failed = False
+            for corridor in self._missing():
+                if self._stopped.is_set():
+                    return
+                try:
+                    self._add(corridor, self.quotation.create(corridor))
+                except Exception:
+                    self._failed()
+                    failed = True
+            self._wake.wait(self.retry_interval if failed else self._next_wake())
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="killb-quotation-pool")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters,
+                    "available": sum(len(pool) for pool in self._pools.values())}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class AsyncQuotationPool(QuotationPool):
+    """
+        asyncio counterpart of QuotationPool, built on an AsyncQuotation and refilled by a background task.
+
+        `start` and `take` must be called from the event loop; `take` and `stop` are coroutines, and the pool can be
+        used with `async with`.
+    """
+    def __init__(self, quotation, corridors: list, size: int = 1, rotate_before: float = 10,
+                 retry_interval: float = 5):
+        super().__init__(quotation, corridors, size, rotate_before, retry_interval)
+        self._task = None
+        self._async_wake = None
+
+    async def _run_async(self):
+        import asyncio
+
+        while True:
+            failed = False
+            for corridor in self._missing():
+                try:
+                    self._add(corridor, await self.quotation.create(corridor))
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self._failed()
+                    failed = True
+            try:
+                await asyncio.wait_for(self._async_wake.wait(),
+                                       self.retry_interval if failed else self._next_wake())
+            except asyncio.TimeoutError:
+                pass
+            self._async_wake.clear()
+
+    def start(self):
+        import asyncio
+        from killb.deadline import detached_context
+
+        if self._task is None or self._task.done():
+            self._async_wake = asyncio.Event()
+            self._task = detached_context().run(asyncio.ensure_future, self._run_async())
+        return self
+
+    async def take(self, data):
+        quotation = self._pop(data)
+        if self._async_wake is not None:
+            self._async_wake.set()
+        if quotation is not None:
+            return quotation
+        with self._lock:
+            self._counters["on_demand"] += 1
+        return await self.quotation.create(data)
+
+    async def stop(self):
+        import asyncio
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
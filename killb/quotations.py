@@ -16,7 +16,8 @@ class Quotation:
         create(data: CreateQuotation) -> CreateQuotationResponse
             Creates a new quotation based on the provided data.
         simulate(data: CreateQuotation) -> SimulateQuotationResponse
-            Simulates a quotation based on the provided data without actually creating it.
+            Simulates a quotation based on the provided data without actually creating it. Results are served from
+            the client's SimulationCache, if it has one.
     """
     def __init__(self, api_requests: ApiRequests):
         """
@@ -89,4 +90,27 @@ class Quotation:
            response = quotation.simulate(quotation_data)
            print(response)
         """
+        cache = self.api_requests.simulation_cache
+        if cache is None:
+            return self._request_simulation(data)
+        return cache.get(self.api_requests.token_store_key(), data, self._request_simulation)
+
+    def _request_simulation(self, data: CreateQuotation) -> SimulateQuotationResponse:
         return self.api_requests.request(method="POST", endpoint="quotations/simulation", json=data)
+
+
+class AsyncQuotation(Quotation):
+    """
+        Async counterpart of Quotation, built on an AsyncApiRequests instance.
+
+        Every method is a coroutine that takes the same parameters and returns the same data as its Quotation
+        equivalent.
+    """
+    async def create(self, data: CreateQuotation) -> CreateQuotationResponse:
+        return await super().create(data)
+
+    async def simulate(self, data: CreateQuotation) -> SimulateQuotationResponse:
+        cache = self.api_requests.simulation_cache
+        if cache is None:
+            return await self._request_simulation(data)
+        return await cache.get_async(self.api_requests.token_store_key(), data, self._request_simulation)
@@ -1,5 +1,7 @@
+from typing import Iterator, AsyncIterator
 from killb.api_requests import ApiRequests
 from killb.types.ramps import CreateRampResponse, CreateRampData, GetRampQueryResponse, GetRampQuery
+from killb.pagination import iter_pages, aiter_pages
 from urllib.parse import urlencode
 
 
@@ -18,6 +20,9 @@ class Ramps:
             Creates a new ramp based on the provided data.
         get_by_query(data: GetRampQuery) -> GetRampQueryResponse
             Retrieves ramps based on the provided query parameters.
+        iter_by_query(data: GetRampQuery, prefetch: bool = True, workers: int = 1,
+                      ordered: bool = True) -> Iterator[CreateRampResponse]
+            Yields every ramp matching the query, across all pages.
     """
     def __init__(self, api_requests: ApiRequests):
         """
@@ -90,3 +95,50 @@ class Ramps:
         """
         query_string = urlencode(data)
         return self.api_requests.request(method="GET", endpoint=f"ramps?{query_string}")
+
+    def iter_by_query(self, data: GetRampQuery, prefetch: bool = True, workers: int = 1,
+                      ordered: bool = True) -> Iterator[CreateRampResponse]:
+        """
+            Yields every ramp matching the query, one at a time, across all pages.
+
+            Parameters
+            ----------
+            data : GetRampQuery
+                The query parameters. `limit` sets the page size and `page` the first page (default 1).
+            prefetch : bool, optional
+                Whether the next page is fetched in the background while the current one is consumed (default True).
+            workers : int, optional
+                For bulk listings, the number of pages fetched concurrently once `totalPage` is known from the
+                first page (default 1). Requests still go through the client's rate limiter, if any.
+            ordered : bool, optional
+                Whether records are yielded in page order when `workers` is above 1 (default True).
+
+            Returns
+            -------
+            Iterator[CreateRampResponse]
+                The matching ramps.
+
+            Example
+            -------
+            for ramp in ramps.iter_by_query({"userId": "user123", "limit": 100}):
+                print(ramp["id"])
+        """
+        return iter_pages(self.get_by_query, data, "ramps", prefetch, workers, ordered)
+
+
+class AsyncRamps(Ramps):
+    """
+        Async counterpart of Ramps, built on an AsyncApiRequests instance.
+
+        Every method is a coroutine that takes the same parameters and returns the same data as its Ramps equivalent,
+        except `iter_by_query`, which returns an async iterator.
+    """
+    async def create(self, data: CreateRampData) -> CreateRampResponse:
+        return await super().create(data)
+
+    async def get_by_query(self, data: GetRampQuery) -> GetRampQueryResponse:
+        return await super().get_by_query(data)
+
+    def iter_by_query(self, data: GetRampQuery, prefetch: bool = True, workers: int = 1,
+                      ordered: bool = True) -> AsyncIterator[CreateRampResponse]:
+        return aiter_pages(self.get_by_query, data, "ramps", prefetch, workers, ordered)
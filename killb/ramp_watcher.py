@@ -0,0 +1,421 @@
+import threading
+import time
+from collections import namedtuple
+from killb.pagination import page_records, iter_pages, aiter_pages
+
+# The ramp statuses the API types do not enumerate, as observed in the sandbox. They are examples for the
+# `active_statuses` and `terminal_statuses` of RampWatcher, not a contract of the API.
+ACTIVE_STATUSES = ("CREATED", "CASH_IN_REQUESTED", "CASH_IN_PROCESSING", "CASH_IN_COMPLETED",
+                   "CONVERSION_PROCESSING", "CASH_OUT_REQUESTED", "CASH_OUT_PROCESSING")
+TERMINAL_STATUSES = ("COMPLETED", "REFUNDED", "CANCELED", "EXPIRED", "FAILED", "ERROR")
+
+RampTransition = namedtuple("RampTransition", ["ramp_id", "previous", "status", "ramp"])
+RampTransition.__doc__ = """
+        A status change of a watched ramp.
+
+        Attributes
+        ----------
+        ramp_id : str
+            The id of the ramp.
+        previous : str
+            The status the watcher knew before, or None for the first observation.
+        status : str
+            The new status.
+        ramp : CreateRampResponse
+            The ramp as last returned by the API.
+"""
+
+
+class _Watched:
+    __slots__ = ("status", "misses", "next_check")
+
+    def __init__(self, status):
+        self.status = status
+        self.misses = 0
+        self.next_check = None
+
+
+class RampWatcher:
+    """
+        Follows many ramps through their lifecycle with a few paginated listings instead of one request per ramp.
+
+        Each tick lists the ramps in every status of `active_statuses` with `Ramps.get_by_query`, so the number of
+        requests depends on how many ramps are in flight account-wide, not on how many are watched. A watched ramp
+        that shows up in a listing under a new status yields a RampTransition. A watched ramp missing from every
+        listing has most likely just finished; it is checked on its own by id, and while it is not confirmed in one
+        of the `terminal_statuses` these checks back off exponentially up to `max_interval`. Ramps that reach a
+        terminal status are reported once and no longer watched.
+
+        The API types do not enumerate ramp statuses, so the watcher assumes the lifecycle it is given: every status
+        a ramp can wait in must be in `active_statuses` and every final one in `terminal_statuses`. ACTIVE_STATUSES
+        and TERMINAL_STATUSES hold the statuses seen in the sandbox and can serve as a starting point.
+
+        A tick applies its transitions only once all of its requests are done. A listing that fails fails the tick
+        and changes nothing; a check by id that fails is counted in `errors` and retried later, the ramp stays
+        watched, and the transitions of the other ramps are still reported.
+
+        The listings are polled every `interval` seconds while transitions are seen; each tick without one multiplies
+        the delay by `backoff`, up to `max_interval`.
+
+        Example
+        -------
+        def on_change(transition):
+            print(transition.ramp_id, transition.previous, "->", transition.status)
+
+        with RampWatcher(client.Ramps, ACTIVE_STATUSES, TERMINAL_STATUSES, on_change=on_change) as watcher:
+            watcher.watch(ramp["id"])
+            ...
+
+        Attributes
+        ----------
+        ramps : Ramps
+            The resource ramps are listed with.
+        active_statuses : tuple
+            The statuses listed on each tick, e.g. ACTIVE_STATUSES.
+        terminal_statuses : tuple
+            The statuses after which a ramp is no longer watched, e.g. TERMINAL_STATUSES.
+        interval : float
+            The shortest delay between ticks, in seconds (default 5).
+        max_interval : float
+            The longest delay between ticks and between checks of a missing ramp, in seconds (default 60).
+        backoff : float
+            The factor the delay grows by after a tick without transitions (default 2).
+        page_size : int
+            The `limit` of each listing page (default 100).
+        max_checks : int
+            The most missing ramps checked by id in one tick (default 50).
+        on_change : callable
+            Called with each RampTransition, in the polling thread.
+
+        Methods
+        -------
+        watch(ramp_id: str, status: str = None)
+            Starts watching a ramp. With `status`, the first transition is reported only when it changes.
+        unwatch(ramp_id: str)
+            Stops watching a ramp.
+        poll() -> list[RampTransition]
+            Runs one tick and returns its transitions, after passing them to `on_change`.
+        start()
+            Starts polling on a background thread.
+        stop()
+            Stops the background thread.
+        stats() -> dict
+            Returns the ticks, requests, transitions and errors so far, the ramps watched and the current delay.
+    """
+    def __init__(self, ramps, active_statuses: tuple, terminal_statuses: tuple, interval: float = 5,
+                 max_interval: float = 60, backoff: float = 2, page_size: int = 100, max_checks: int = 50,
+                 on_change=None):
+        self.ramps = ramps
+        self.active_statuses = tuple(active_statuses)
+        self.terminal_statuses = frozenset(terminal_statuses)
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.page_size = page_size
+        self.max_checks = max_checks
+        self.on_change = on_change
+        self._watched = {}
+        self._delay = interval
+        self._counters = {"ticks": 0, "requests": 0, "transitions": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def watch(self, ramp_id: str, status: str = None):
+        with self._lock:
+            if ramp_id not in self._watched:
+                self._watched[ramp_id] = _Watched(status)
+        self._delay = self.interval
+        self._wake.set()
+
+    def unwatch(self, ramp_id: str):
+        with self._lock:
+            self._watched.pop(ramp_id, None)
+
+    def __len__(self):
+        return len(self._watched)
+
+    def _listing_query(self, status):
+        return {"status": status, "limit": self.page_size}
+
+    def _transition(self, ramp_id, status, ramp):
+        """
+            Records the status of a ramp and returns its RampTransition, or None when nothing changed.
+            Callers hold self._lock.
+        """
+        watched = self._watched.get(ramp_id)
+        if watched is None:
+            return None
+        previous = watched.status
+        watched.status = status
+        if status in self.terminal_statuses:
+            del self._watched[ramp_id]
+        if previous == status:
+            return None
+        return RampTransition(ramp_id, previous, status, ramp)
+
+    def _schedule_checks(self, seen, now):
+        """
+            Schedules a check for each watched ramp missing from the listings and returns the ramps due for one.
+        """
+        with self._lock:
+            for ramp_id, watched in self._watched.items():
+                if ramp_id in seen:
+                    watched.misses = 0
+                    watched.next_check = None
+                elif watched.next_check is None:
+                    watched.next_check = now
+            due = sorted((watched.next_check, ramp_id) for ramp_id, watched in self._watched.items()
+                         if watched.next_check is not None and watched.next_check <= now)
+        return [ramp_id for _, ramp_id in due[:self.max_checks]]
+
+    @staticmethod
+    def _checked(ramp_id, page):
+        """
+            Returns the status and ramp found by a check, or None when the ramp or its status is missing.
+        """
+        ramp = next((record for record in page_records(page, "ramps") if record.get("id") == ramp_id), None)
+        if ramp is None or ramp.get("status") is None:
+            return None
+        return ramp["status"], ramp
+
+    def _apply_tick(self, seen, checks, now):
+        """
+            Applies the listings and the checks of a tick and returns its transitions.
+
+            `checks` maps each checked ramp id to its status and ramp, None when the check found nothing, or the
+            exception the check raised. Ramps whose check failed or found them not yet terminal are checked again
+            later, backing off while they stay out of the listings.
+        """
+        transitions = []
+        with self._lock:
+            for ramp_id, (status, ramp) in seen.items():
+                transition = self._transition(ramp_id, status, ramp)
+                if transition is not None:
+                    transitions.append(transition)
+            for ramp_id, checked in checks.items():
+                if isinstance(checked, Exception):
+                    self._counters["errors"] += 1
+                elif checked is not None:
+                    transition = self._transition(ramp_id, *checked)
+                    if transition is not None:
+                        transitions.append(transition)
+                watched = self._watched.get(ramp_id)
+                if watched is not None:
+                    watched.misses += 1
+                    watched.next_check = now + min(self.interval * self.backoff ** watched.misses, self.max_interval)
+        return transitions
+
+    def _finish_tick(self, transitions, requests):
+        with self._lock:
+            self._counters["ticks"] += 1
+            self._counters["requests"] += requests
+            self._counters["transitions"] += len(transitions)
+        if transitions:
+            self._delay = self.interval
+        else:
+            self._delay = min(self._delay * self.backoff, self.max_interval)
+
+    def _next_wake(self):
+        """
+            Returns how many seconds until the next tick: the current delay, or sooner if a check is due.
+        """
+        with self._lock:
+            checks = [watched.next_check for watched in self._watched.values() if watched.next_check is not None]
+        delay = self._delay
+        if checks:
+            delay = min(delay, max(min(checks) - time.monotonic(), 0))
+        return delay
+
+    def _deliver(self, transitions):
+        if self.on_change is not None:
+            for transition in transitions:
+                self.on_change(transition)
+
+    def poll(self):
+        if not self._watched:
+            return []
+        requests = 0
+
+        def fetch(query):
+            nonlocal requests
+            requests += 1
+            return self.ramps.get_by_query(query)
+
+        seen = {}
+        for status in self.active_statuses:
+            for ramp in iter_pages(fetch, self._listing_query(status), "ramps"):
+                ramp_id = ramp.get("id")
+                if ramp_id in self._watched:
+                    seen[ramp_id] = (ramp.get("status") or status, ramp)
+        checks = {}
+        for ramp_id in self._schedule_checks(seen, time.monotonic()):
+            requests += 1
+            try:
+                checks[ramp_id] = self._checked(ramp_id, self.ramps.get_by_query({"id": ramp_id}))
+            except Exception as error:
+                checks[ramp_id] = error
+        transitions = self._apply_tick(seen, checks, time.monotonic())
+        self._finish_tick(transitions, requests)
+        self._deliver(transitions)
+        return transitions
+
+    def _failed(self):
+        with self._lock:
+            self._counters["errors"] += 1
+        self._delay = min(self._delay * self.backoff, self.max_interval)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception:
+                self._failed()
+            self._wake.wait(self._next_wake() if self._watched else None)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="killb-ramp-watcher")
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "watched": len(self._watched), "delay": self._delay}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class AsyncRampWatcher(RampWatcher):
+    """
+        asyncio counterpart of RampWatcher, built on an AsyncRamps and polled by a background task.
+
+        `poll` and `stop` are coroutines, and `on_change` may be a coroutine function. The watcher is also an async
+        iterator of RampTransition: iterating starts the polling task if needed and yields transitions as they are
+        seen.
+
+        Example
+        -------
+        async with AsyncRampWatcher(async_client.Ramps, ACTIVE_STATUSES, TERMINAL_STATUSES) as watcher:
+            watcher.watch(ramp["id"])
+            async for transition in watcher:
+                print(transition.ramp_id, transition.status)
+    """
+    def __init__(self, ramps, active_statuses: tuple, terminal_statuses: tuple, interval: float = 5,
+                 max_interval: float = 60, backoff: float = 2, page_size: int = 100, max_checks: int = 50,
+                 on_change=None):
+        super().__init__(ramps, active_statuses, terminal_statuses, interval, max_interval, backoff, page_size,
+                         max_checks, on_change)
+        self._task = None
+        self._async_wake = None
+        self._queue = None
+
+    def watch(self, ramp_id: str, status: str = None):
+        super().watch(ramp_id, status)
+        if self._async_wake is not None:
+            self._async_wake.set()
+
+    async def poll(self):
+        import asyncio
+
+        if not self._watched:
+            return []
+        requests = 0
+
+        async def fetch(query):
+            nonlocal requests
+            requests += 1
+            return await self.ramps.get_by_query(query)
+
+        seen = {}
+        for status in self.active_statuses:
+            async for ramp in aiter_pages(fetch, self._listing_query(status), "ramps"):
+                ramp_id = ramp.get("id")
+                if ramp_id in self._watched:
+                    seen[ramp_id] = (ramp.get("status") or status, ramp)
+        due = self._schedule_checks(seen, time.monotonic())
+        pages = await asyncio.gather(*(self.ramps.get_by_query({"id": ramp_id}) for ramp_id in due),
+                                     return_exceptions=True)
+        requests += len(due)
+        checks = {}
+        for ramp_id, page in zip(due, pages):
+            if isinstance(page, BaseException) and not isinstance(page, Exception):
+                raise page
+            checks[ramp_id] = page if isinstance(page, Exception) else self._checked(ramp_id, page)
+        transitions = self._apply_tick(seen, checks, time.monotonic())
+        self._finish_tick(transitions, requests)
+        for transition in transitions:
+            if self._queue is not None:
+                self._queue.put_nowait(transition)
+            if self.on_change is not None:
+                result = self.on_change(transition)
+                if asyncio.iscoroutine(result):
+                    await result
+        return transitions
+
+    async def _run_async(self):
+        import asyncio
+
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._failed()
+            try:
+                await asyncio.wait_for(self._async_wake.wait(), self._next_wake() if self._watched else None)
+            except asyncio.TimeoutError:
+                pass
+            self._async_wake.clear()
+
+    def start(self):
+        import asyncio
+        from killb.deadline import detached_context
+
+        if self._task is None or self._task.done():
+            self._async_wake = asyncio.Event()
+            self._task = detached_context().run(asyncio.ensure_future, self._run_async())
+        return self
+
+    async def stop(self):
+        import asyncio
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def __aiter__(self):
+        import asyncio
+
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self.start()
+        return self
+
+    async def __anext__(self):
+        return await self._queue.get()
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
@@ -0,0 +1,171 @@
+import threading
+import time
+from killb.endpoints import endpoint_template
+
+
+class TokenBucket:
+    """
+        A thread-safe token bucket.
+
+        Callers reserve a token and are told how long to wait for it. The bucket may go into debt, so callers are
+        served in the order they reserved and the wait grows with the queue in front of them.
+
+        Attributes
+        ----------
+        rate : float
+            The number of tokens added per second.
+        burst : float
+            The maximum number of tokens the bucket holds.
+
+        Methods
+        -------
+        reserve() -> float
+            Takes a token and returns how many seconds the caller must wait before using it.
+        pause(seconds: float)
+            Holds back every token for the next `seconds`, e.g. after a 429 with `Retry-After`.
+    """
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+
+class RateLimiter:
+    """
+        Shapes outgoing requests with one token bucket per credential and endpoint template.
+
+        Every bucket starts at its target rate: `endpoint_rates[template]` when configured, `rate` otherwise.
+        The limiter is adaptive: each 429 response halves the bucket's rate (down to `min_rate`) and pauses it for
+        the `Retry-After` period, and each successful response raises it again by `increase_ratio` of the target
+        until the target is reached. One limiter may be shared by several clients, threads and event loops; sync
+        callers sleep and async callers await the wait time.
+
+        Attributes
+        ----------
+        rate : float
+            The default target requests per second for an endpoint template.
+        burst : float
+            The number of requests that may be sent back to back after an idle period (default: one second's worth).
+        endpoint_rates : dict
+            Target rates for specific endpoint templates, e.g. `{"quotations/simulation": 5}`.
+        min_rate : float
+            The lowest rate the adaptive decrease goes down to (default 10% of the target).
+        decrease_factor : float
+            The factor applied to the rate on a 429 response (default 0.5).
+        increase_ratio : float
+            The fraction of the target rate restored per successful response (default 0.05).
+
+        Methods
+        -------
+        reserve(credential: str, endpoint: str) -> float
+            Takes a token for the endpoint and returns how many seconds to wait.
+        acquire(credential: str, endpoint: str) -> float
+            Blocks until a token is available and returns the time waited.
+        acquire_async(credential: str, endpoint: str) -> float
+            Coroutine that waits until a token is available and returns the time waited.
+        observe(credential: str, endpoint: str, status_code: int, retry_after: float = None)
+            Adapts the endpoint's rate to a response.
+        stats() -> dict
+            Returns the current rate, number of calls and queue wait times per endpoint template.
+    """
+    def __init__(self, rate: float, burst: float = None, endpoint_rates: dict = None, min_rate: float = None,
+                 decrease_factor: float = 0.5, increase_ratio: float = 0.05):
+        self.rate = rate
+        self.burst = burst
+        self.endpoint_rates = endpoint_rates or {}
+        self.min_rate = min_rate
+        self.decrease_factor = decrease_factor
+        self.increase_ratio = increase_ratio
+        self._buckets = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _target(self, template):
+        return self.endpoint_rates.get(template, self.rate)
+
+    def _bucket(self, credential, template):
+        key = (credential, template)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(self._target(template), self.burst)
+        return bucket
+
+    def _template_stats(self, template):
+        # Callers hold self._lock.
+        return self._stats.setdefault(template, {"calls": 0, "throttled": 0, "wait_total": 0.0, "wait_max": 0.0})
+
+    def _record(self, template, waited):
+        with self._lock:
+            stats = self._template_stats(template)
+            stats["calls"] += 1
+            stats["wait_total"] += waited
+            stats["wait_max"] = max(stats["wait_max"], waited)
+
+    def reserve(self, credential, endpoint):
+        template = endpoint_template(endpoint)
+        waited = self._bucket(credential, template).reserve()
+        self._record(template, waited)
+        return waited
+
+    def acquire(self, credential, endpoint):
+        waited = self.reserve(credential, endpoint)
+        if waited:
+            time.sleep(waited)
+        return waited
+
+    async def acquire_async(self, credential, endpoint):
+        import asyncio
+
+        waited = self.reserve(credential, endpoint)
+        if waited:
+            await asyncio.sleep(waited)
+        return waited
+
+    def observe(self, credential, endpoint, status_code, retry_after=None):
+        template = endpoint_template(endpoint)
+        bucket = self._bucket(credential, template)
+        target = self._target(template)
+        if status_code == 429:
+            min_rate = self.min_rate if self.min_rate is not None else target * 0.1
+            bucket.set_rate(max(bucket.rate * self.decrease_factor, min_rate))
+            if retry_after:
+                bucket.pause(retry_after)
+            with self._lock:
+                self._template_stats(template)["throttled"] += 1
+        elif status_code < 400 and bucket.rate < target:
+            bucket.set_rate(min(bucket.rate + target * self.increase_ratio, target))
+
+    def stats(self):
+        with self._lock:
+            stats = {template: dict(values) for template, values in self._stats.items()}
+            rates = {}
+            for (_, template), bucket in self._buckets.items():
+                rates[template] = min(rates.get(template, bucket.rate), bucket.rate)
+        for template, values in stats.items():
+            values["rate"] = rates.get(template, self._target(template))
+        return stats
@@ -0,0 +1,133 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from killb.exceptions import KillBApiError, AuthenticationError, NetworkError
+
+
+class RetryPolicy:
+    """
+        Decides whether and when a failed request is retried.
+
+        Delays grow exponentially with the attempt number and use full jitter, so clients that failed together do
+        not retry together. A `Retry-After` header on 429 and 503 responses takes precedence over the computed
+        backoff. Network errors and the statuses in `retry_statuses` are retryable; other errors, such as 4xx
+        validation errors and failed authentication, are raised immediately.
+
+        Methods that are not idempotent (POST, PATCH) are only retried when an idempotency key is attached, which
+        ApiRequests does for every such request when `idempotency_keys` is True. The key is generated once per call
+        and reused on every retry of that call, so the API can recognise and drop the duplicates.
+
+        Attributes
+        ----------
+        max_retries : int
+            The maximum number of retries after the first attempt (default 3).
+        backoff_factor : float
+            The base delay in seconds; attempt `n` waits up to `backoff_factor * 2 ** n` (default 0.5).
+        max_backoff : float
+            The maximum delay in seconds between two attempts (default 30).
+        jitter : bool
+            Whether delays are drawn uniformly between zero and the exponential backoff (default True).
+        retry_statuses : tuple
+            The HTTP statuses that are retried (default 429, 500, 502, 503 and 504).
+        idempotent_methods : tuple
+            The HTTP methods that are safe to retry without an idempotency key.
+        idempotency_keys : bool
+            Whether POST and PATCH requests carry an idempotency key (default True).
+        idempotency_header : str
+            The header that carries the idempotency key (default `Idempotency-Key`).
+        max_retry_after : float
+            The longest `Retry-After` the policy is willing to wait; longer ones raise immediately (default 60).
+
+        Methods
+        -------
+        is_retryable(method: str, error: Exception, idempotent: bool) -> bool
+            Classifies an error raised by a request.
+        next_delay(attempt: int, method: str, error: Exception, idempotent: bool) -> float or None
+            Returns how long to wait before retrying, or None when the error must be raised.
+    """
+    def __init__(self, max_retries: int = 3, backoff_factor: float = 0.5, max_backoff: float = 30,
+                 jitter: bool = True, retry_statuses: tuple = (429, 500, 502, 503, 504),
+                 idempotent_methods: tuple = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE"),
+                 idempotency_keys: bool = True, idempotency_header: str = "Idempotency-Key",
+                 max_retry_after: float = 60):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = retry_statuses
+        self.idempotent_methods = idempotent_methods
+        self.idempotency_keys = idempotency_keys
+        self.idempotency_header = idempotency_header
+        self.max_retry_after = max_retry_after
+
+    def needs_idempotency_key(self, method):
+        return self.idempotency_keys and method.upper() not in self.idempotent_methods
+
+    def is_retryable(self, method, error, idempotent=False):
+        if not (idempotent or method.upper() in self.idempotent_methods):
+            return False
+        if isinstance(error, AuthenticationError):
+            return False
+        if isinstance(error, NetworkError):
+            return True
+        return isinstance(error, KillBApiError) and error.status_code in self.retry_statuses
+
+    def backoff(self, attempt):
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def next_delay(self, attempt, method, error, idempotent=False):
+        if attempt >= self.max_retries or not self.is_retryable(method, error, idempotent):
+            return None
+
+        retry_after = retry_after_seconds(error)
+        if retry_after is None:
+            return self.backoff(attempt)
+        if retry_after > self.max_retry_after:
+            return None
+        return retry_after
+
+
+def retry_after_seconds(error):
+    """
+        Reads the `Retry-After` header of a 429 or 503 error.
+
+        Parameters
+        ----------
+        error : Exception
+            The error raised by a request.
+
+        Returns
+        -------
+        float or None
+            The number of seconds the server asked to wait, or None when it did not say.
+    """
+    if not isinstance(error, KillBApiError) or error.status_code not in (429, 503):
+        return None
+    return parse_retry_after(next((v for k, v in error.headers.items() if k.lower() == "retry-after"), None))
+
+
+def parse_retry_after(value):
+    """
+        Parses a `Retry-After` header value given either in seconds or as an HTTP date.
+
+        Parameters
+        ----------
+        value : str or None
+            The header value.
+
+        Returns
+        -------
+        float or None
+            The number of seconds to wait, or None when the value is missing or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
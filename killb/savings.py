@@ -2,6 +2,8 @@ from killb.api_requests import ApiRequests
 from killb.types.savings import SavingsCreateResponse, SavingsWithdrawalData, SavingsWithdrawalReturn, \
     SavingsGetTransactionReturn, SavingsGetTransactions, SavingsGetBalanceReturn, SavingsGetDepositInstructions, \
     SavingsGetDepositInstructionsReturn
+from killb.pagination import iter_pages, aiter_pages
+from typing import Iterator, AsyncIterator
 from urllib.parse import urlencode
 
 
@@ -28,6 +30,10 @@ class Savings:
         get_transactions(data: SavingsGetTransactions) -> SavingsGetTransactionReturn
             Retrieves transactions associated with the savings account based on the provided query parameters.
 
+        iter_transactions(data: SavingsGetTransactions, prefetch: bool = True, workers: int = 1,
+                          ordered: bool = True) -> Iterator[SavingsGetTransactionReturn]
+            Yields every transaction matching the query parameters, across all pages.
+
         get_balance(savings_account_id: str) -> SavingsGetBalanceReturn
             Retrieves the balance of the specified savings account.
 
@@ -113,6 +119,30 @@ class Savings:
         query_string = urlencode(data)
         return self.api_requests.request(method="GET", endpoint=f"savings/transactions?{query_string}")
 
+    def iter_transactions(self, data: SavingsGetTransactions, prefetch: bool = True, workers: int = 1,
+                          ordered: bool = True) -> Iterator[SavingsGetTransactionReturn]:
+        """
+            Yields every transaction matching the query parameters, one at a time, across all pages.
+
+            Parameters
+            ----------
+            data : SavingsGetTransactions
+                The query parameters. `limit` sets the page size and `page` the first page (default 1).
+            prefetch : bool, optional
+                Whether the next page is fetched in the background while the current one is consumed (default True).
+            workers : int, optional
+                For bulk listings, the number of pages fetched concurrently once `totalPage` is known from the
+                first page (default 1). Requests still go through the client's rate limiter, if any.
+            ordered : bool, optional
+                Whether records are yielded in page order when `workers` is above 1 (default True).
+
+            Returns
+            -------
+            Iterator[SavingsGetTransactionReturn]
+                The matching transactions.
+        """
+        return iter_pages(self.get_transactions, data, "transactions", prefetch, workers, ordered)
+
     def get_balance(self, savings_account_id: str) -> SavingsGetBalanceReturn:
         """
             Retrieves the balance of the specified savings account.
@@ -161,3 +191,36 @@ class Savings:
                 The wallet address associated with the specified savings account.
         """
         return self.api_requests.request(method="GET", endpoint=f"savings/{savings_account_id}/crypto-deposit-instructions")
+
+
+class AsyncSavings(Savings):
+    """
+        Async counterpart of Savings, built on an AsyncApiRequests instance.
+
+        Every method is a coroutine that takes the same parameters and returns the same data as its Savings
+        equivalent, except `iter_transactions`, which returns an async iterator.
+    """
+    async def create(self, user_id: str) -> SavingsCreateResponse:
+        return await super().create(user_id)
+
+    async def get(self, user_id: str) -> SavingsCreateResponse:
+        return await super().get(user_id)
+
+    async def withdrawal(self, data: SavingsWithdrawalData) -> SavingsWithdrawalReturn:
+        return await super().withdrawal(data)
+
+    async def get_transactions(self, data: SavingsGetTransactions) -> SavingsGetTransactionReturn:
+        return await super().get_transactions(data)
+
+    def iter_transactions(self, data: SavingsGetTransactions, prefetch: bool = True, workers: int = 1,
+                          ordered: bool = True) -> AsyncIterator[SavingsGetTransactionReturn]:
+        return aiter_pages(self.get_transactions, data, "transactions", prefetch, workers, ordered)
+
+    async def get_balance(self, savings_account_id: str) -> SavingsGetBalanceReturn:
+        return await super().get_balance(savings_account_id)
+
+    async def get_deposit_instructions(self, data: SavingsGetDepositInstructions) -> SavingsGetDepositInstructionsReturn:
+        return await super().get_deposit_instructions(data)
+
+    async def get_wallet_address(self, savings_account_id: str):
+        return await super().get_wallet_address(savings_account_id)
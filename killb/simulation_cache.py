@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from killb.deadline import current_deadline, detached_context
+from killb.exceptions import DeadlineExceededError
+from killb.single_flight import SingleFlight, AsyncSingleFlight
+
+_KEY_DEFAULTS = {"amountIsToCurrency": False}
+
+
+def normalize_quotation(data):
+    """
+        Normalizes CreateQuotation data so that equivalent requests compare equal.
+
+        Parameters
+        ----------
+        data : CreateQuotation
+            The quotation request, possibly with Enum members and missing defaults.
+
+        Returns
+        -------
+        dict
+            The request with Enum members replaced by their values, None values dropped and defaults filled in.
+    """
+    normalized = dict(_KEY_DEFAULTS)
+    for field, value in data.items():
+        if value is not None:
+            normalized[field] = value.value if isinstance(value, Enum) else value
+    return normalized
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value, ttl, stale_ttl):
+        now = time.monotonic()
+        self.value = value
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale_ttl
+
+
+class SimulationCache:
+    """
+        Caches `Quotation.simulate` results per corridor and amount bucket, refreshing them in the background.
+
+        Simulations are keyed on the normalized CreateQuotation fields: Enum members are replaced by their values,
+        missing defaults are filled in, and the amount is rounded to its bucket. With `amount_bucket=50`, for
+        instance, amounts of 1010 and 990 both simulate 1000, so the response describes the bucket's amount and its
+        rate rather than the exact amount asked for. `amount_bucket` may also be a callable mapping an amount to
+        the amount to simulate.
+
+        A result is fresh for `ttl` seconds and served from memory. For the following `stale_ttl` seconds it is
+        still served immediately while one background request fetches a fresh rate (stale-while-revalidate); after
+        that the next caller waits for a new simulation. Concurrent misses for the same key share one request.
+
+        Attributes
+        ----------
+        ttl : float
+            How many seconds a simulation is fresh (default 5).
+        stale_ttl : float
+            How many seconds a simulation may be served stale while it is refreshed (default 30).
+        amount_bucket : float or callable
+            The bucket width amounts are rounded to, or a function returning the amount to simulate (default None,
+            i.e. exact amounts).
+        max_entries : int
+            The maximum number of cached simulations, evicted least recently used first (default 1024).
+
+        Methods
+        -------
+        key(credential: str, data: CreateQuotation) -> tuple
+            Returns the cache key of a simulation request.
+        normalize(data: CreateQuotation) -> dict
+            Returns the request data that is actually simulated.
+        get(credential: str, data: CreateQuotation, fetch) -> SimulateQuotationResponse
+            Returns a cached simulation, or calls `fetch(normalized_data)` for one.
+        get_async(credential: str, data: CreateQuotation, fetch) -> SimulateQuotationResponse
+            Coroutine counterpart of `get`, for a coroutine function `fetch`.
+        clear()
+            Drops every cached simulation.
+        stats() -> dict
+            Returns the entries, fresh hits, stale hits, misses, background refreshes and refresh errors.
+    """
+    def __init__(self, ttl: float = 5, stale_ttl: float = 30, amount_bucket=None, max_entries: int = 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.amount_bucket = amount_bucket
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._background = set()
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self._lock = threading.Lock()
+
+    def _bucket(self, amount):
+        if amount is None or not self.amount_bucket:
+            return amount
+        if callable(self.amount_bucket):
+            return self.amount_bucket(amount)
+        bucketed = max(round(amount / self.amount_bucket), 1) * self.amount_bucket
+        return int(bucketed) if float(bucketed).is_integer() else bucketed
+
+    def normalize(self, data):
+        normalized = normalize_quotation(data)
+        if "amount" in normalized:
+            normalized["amount"] = self._bucket(normalized["amount"])
+        return normalized
+
+    def key(self, credential, data):
+        return credential, tuple(sorted(self.normalize(data).items()))
+
+    def _lookup(self, key):
+        """
+            Returns the cached value, if any, and whether it is stale and needs a background refresh.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stale_until <= now:
+                self._counters["misses"] += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if entry.fresh_until > now:
+                self._counters["hits"] += 1
+                return entry.value, False
+            self._counters["stale_hits"] += 1
+            refresh = key not in self._refreshing
+            self._refreshing.add(key)
+            return entry.value, refresh
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = _Entry(value, self.ttl, self.stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def _refreshed(self, key, error=None):
+        with self._lock:
+            self._refreshing.discard(key)
+            self._counters["refreshes"] += 1
+            if error is not None:
+                self._counters["refresh_errors"] += 1
+
+    def get(self, credential, data, fetch):
+        key = self.key(credential, data)
+        value, refresh = self._lookup(key)
+        if refresh:
+            threading.Thread(target=self._refresh, args=(key, fetch), daemon=True,
+                             name="killb-simulation-refresh").start()
+        if value is not None:
+            return value
+        deadline = current_deadline()
+        try:
+            return self._flight.do(key, lambda: self._store(key, fetch(dict(key[1]))),
+                                   wait_timeout=deadline.remaining() if deadline is not None else None)
+        except TimeoutError:
+            raise DeadlineExceededError("Deadline exceeded while waiting for an identical simulation") from None
+
+    def _refresh(self, key, fetch):
+        try:
+            self._store(key, fetch(dict(key[1])))
+        except Exception as error:
+            # The stale simulation keeps being served until it runs out; the next miss surfaces the error.
+            self._refreshed(key, error)
+        else:
+            self._refreshed(key)
+
+    async def get_async(self, credential, data, fetch):
+        import asyncio
+
+        key = self.key(credential, data)
+        value, refresh = self._lookup(key)
+        if refresh:
+            task = detached_context().run(asyncio.ensure_future, self._refresh_async(key, fetch))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        if value is not None:
+            return value
+
+        async def simulate():
+            return self._store(key, await fetch(dict(key[1])))
+        return await self._async_flight.do(key, simulate)
+
+    async def _refresh_async(self, key, fetch):
+        try:
+            self._store(key, await fetch(dict(key[1])))
+        except Exception as error:
+            self._refreshed(key, error)
+        else:
+            self._refreshed(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), **self._counters}
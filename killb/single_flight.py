@@ -0,0 +1,115 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+        Collapses concurrent calls that share a key into one execution.
+
+        The first thread to call `do` for a key runs the function; threads that arrive while it is running wait and
+        receive the same result, or the same exception. Once the call finishes the key is forgotten, so the next
+        call runs the function again.
+
+        Methods
+        -------
+        do(key, fn, *args, wait_timeout=None, background=False, **kwargs)
+            Runs `fn` once for every caller currently asking for `key` and returns its result. Callers that wait
+            for another thread's call raise TimeoutError after `wait_timeout` seconds. With `background=True` the
+            first caller runs `fn` on a new thread and waits for it like the others, so its own `wait_timeout`
+            bounds only its wait and not the call the others share.
+        in_flight() -> int
+            Returns the number of keys currently being executed.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, wait_timeout=None, background=False, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader and not background:
+            return self._run(key, call, fn, args, kwargs)
+        if leader:
+            threading.Thread(target=self._run_quietly, args=(key, call, fn, args, kwargs), daemon=True,
+                             name="killb-single-flight").start()
+        if not call.event.wait(wait_timeout):
+            raise TimeoutError(f"Timed out waiting for the in-flight call for {key!r}")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _run(self, key, call, fn, args, kwargs):
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def _run_quietly(self, key, call, fn, args, kwargs):
+        # The error is handed to the waiting callers.
+        try:
+            self._run(key, call, fn, args, kwargs)
+        except BaseException:
+            pass
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+        asyncio counterpart of SingleFlight.
+
+        The shared call runs in its own task and every caller awaits it through `asyncio.shield`, so cancelling one
+        waiter, even the one that started the call, does not cancel the call for the others.
+
+        Methods
+        -------
+        do(key, fn, *args, wait_timeout=None, context=None, **kwargs)
+            Coroutine that awaits `fn(*args, **kwargs)` once for every caller currently asking for `key`, for at
+            most `wait_timeout` seconds. The shared task runs in `context`, by default a copy of the context of
+            the caller that started it.
+        in_flight() -> int
+            Returns the number of keys currently being executed.
+    """
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, fn, *args, wait_timeout=None, context=None, **kwargs):
+        # Imported here so that synchronous clients do not pay for importing asyncio.
+        import asyncio
+
+        task = self._tasks.get(key)
+        if task is None:
+            if context is None:
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+            else:
+                task = context.run(asyncio.ensure_future, fn(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.wait_for(asyncio.shield(task), wait_timeout)
+
+    def _forget(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self):
+        return len(self._tasks)
@@ -0,0 +1,180 @@
+import json
+import os
+import stat
+import threading
+from abc import ABC, abstractmethod
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class TokenStore(ABC):
+    """
+        Base class for stores that share access tokens between ApiRequests instances.
+
+        A token is a dict with the `accessToken` and its absolute expiry `expiresAt` (a UNIX timestamp). ApiRequests
+        takes the store's lock for its key before refreshing, reuses a still-valid token saved by someone else and
+        otherwise logs in and saves the new token, so only one login happens per expiry across every holder of the
+        lock.
+
+        Subclasses implement `load`, `save` and `lock`; one that misses any of them cannot be instantiated.
+
+        Methods
+        -------
+        load(key: str) -> dict or None
+            Returns the stored token for the key, if any.
+        save(key: str, token: dict)
+            Stores the token for the key.
+        lock(key: str)
+            Returns a context manager that holds the refresh lock for the key.
+    """
+    @abstractmethod
+    def load(self, key):
+        pass
+
+    @abstractmethod
+    def save(self, key, token):
+        pass
+
+    @abstractmethod
+    def lock(self, key):
+        pass
+
+
+class MemoryTokenStore(TokenStore):
+    """
+        A TokenStore shared by the ApiRequests instances of a single process.
+    """
+    def __init__(self):
+        self._tokens = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def load(self, key):
+        return self._tokens.get(key)
+
+    def save(self, key, token):
+        self._tokens[key] = dict(token)
+
+    def lock(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+
+_O_NOFOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+
+
+def _default_directory():
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache, 'killb', 'tokens')
+
+
+def _check_private(path, info):
+    """
+        Raises PermissionError unless `info` describes an entry owned by the current user that no one else can
+        write to. Ownership is not checked on platforms without POSIX user ids.
+    """
+    if not hasattr(os, 'getuid'):
+        return
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not owned by the current user")
+    if info.st_mode & 0o077:
+        raise PermissionError(f"{path} is accessible by other users (mode {stat.S_IMODE(info.st_mode):o})")
+
+
+def _open_private(path, flags):
+    """
+        Opens a file without following symlinks and checks that it belongs to the current user.
+    """
+    fd = os.open(path, flags | _O_NOFOLLOW, 0o600)
+    try:
+        _check_private(path, os.fstat(fd))
+    except PermissionError:
+        os.close(fd)
+        raise
+    return fd
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = os.fdopen(_open_private(self.path, os.O_RDWR | os.O_CREAT), 'r+')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class FileTokenStore(TokenStore):
+    """
+        A TokenStore backed by files and OS file locks, shared by every process on the host.
+
+        Each key gets a JSON token file and a lock file in `directory`. Because they hold bearer tokens, the
+        directory must be owned by the current user, or PermissionError is raised, and is kept at mode 0700.
+        Files are opened without following symlinks, and token files that another user owns or could have written
+        are ignored.
+
+        Attributes
+        ----------
+        directory : str
+            The directory holding the token and lock files. Defaults to `killb/tokens` in the user's cache
+            directory (`$XDG_CACHE_HOME`, or `~/.cache`).
+    """
+    def __init__(self, directory: str = None):
+        self.directory = directory or _default_directory()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        info = os.lstat(self.directory)
+        if not stat.S_ISDIR(info.st_mode):
+            raise PermissionError(f"{self.directory} is not a directory")
+        if hasattr(os, 'getuid') and info.st_uid == os.getuid() and info.st_mode & 0o077:
+            # An existing directory of ours that is too open, e.g. created under a permissive umask.
+            os.chmod(self.directory, 0o700)
+            info = os.lstat(self.directory)
+        _check_private(self.directory, info)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def load(self, key):
+        try:
+            with os.fdopen(_open_private(self._path(key, '.json'), os.O_RDONLY)) as token_file:
+                return json.load(token_file)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, token):
+        path = self._path(key, '.json')
+        temp_path = f"{path}.{os.urandom(8).hex()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | _O_NOFOLLOW, 0o600)
+        try:
+            with os.fdopen(fd, 'w') as token_file:
+                json.dump(token, token_file)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def lock(self, key):
+        return _FileLock(self._path(key, '.lock'))
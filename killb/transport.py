@@ -0,0 +1,395 @@
+import json
+import threading
+import warnings
+from abc import ABC, abstractmethod
+from collections import deque
+from urllib.parse import urlsplit
+from killb.compression import decode_content
+from killb.exceptions import NetworkError
+
+
+class Headers(dict):
+    """
+        A dict of HTTP headers with case-insensitive lookups.
+    """
+    def __init__(self, items=()):
+        super().__init__((key.lower(), value) for key, value in dict(items).items())
+
+    def __getitem__(self, key):
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+
+class Response:
+    """
+        A transport-independent HTTP response.
+
+        Transports read the body as it came over the wire and decompress it, so both sizes are known.
+
+        Attributes
+        ----------
+        status_code : int
+            The HTTP status code.
+        headers : Headers
+            The response headers.
+        content : bytes
+            The decompressed body.
+        wire_size : int
+            The size of the body as received, before decompression.
+        http_version : str
+            The protocol the response was received over, e.g. `HTTP/1.1` or `HTTP/2`.
+    """
+    def __init__(self, status_code: int, headers, content: bytes, wire_size: int = None, http_version: str = None):
+        self.status_code = status_code
+        self.headers = headers if isinstance(headers, Headers) else Headers(headers)
+        self.content = content
+        self.wire_size = len(content) if wire_size is None else wire_size
+        self.http_version = http_version
+
+    @classmethod
+    def from_wire(cls, status_code, headers, raw: bytes, http_version: str = None):
+        """
+            Builds a response from a body as received. A body that cannot be decompressed raises NetworkError, like
+            a response cut off on the wire, so that retries, circuit breakers and callers handle it as a KillB error.
+        """
+        headers = Headers(headers)
+        try:
+            content = decode_content(raw, headers.get("content-encoding"))
+        except ValueError as error:
+            raise NetworkError(f"Network error: {error}") from error
+        return cls(status_code, headers, content, len(raw), http_version)
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Transport(ABC):
+    """
+        The interface ApiRequests sends requests through.
+
+        Pass an instance as `transport=` to a Client or ApiRequests to replace the network, e.g. with a
+        MemoryTransport in tests or a CassetteTransport in benchmarks. Subclasses must implement `send`, or they cannot
+        be instantiated. Transports used by AsyncApiRequests implement `send` and `close` as coroutines.
+
+        Methods
+        -------
+        send(method: str, url: str, headers: dict, content: bytes, data: dict, timeout: tuple, **kwargs) -> Response
+            Sends a request and returns the response. `content` is the encoded body; `data` is a form payload, only
+            used by the login request. Network failures raise NetworkError.
+        pool_stats() -> dict
+            Returns connection statistics.
+        close()
+            Releases the transport's resources.
+    """
+    @abstractmethod
+    def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+        pass
+
+    def pool_stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        warnings.warn("HTTP/2 requires the h2 package (`pip install killb-sdk-python[http2]`); "
+                      "falling back to HTTP/1.1.", RuntimeWarning, stacklevel=3)
+        return False
+    return True
+
+
+class RequestsTransport(Transport):
+    """
+        Sends requests over HTTP/1.1 with a pooled requests.Session.
+
+        Attributes
+        ----------
+        session : requests.Session
+            The pooled session. Its adapters keep up to `max_connections_per_host` connections per host.
+
+        Methods
+        -------
+        send(method: str, url: str, headers: dict, content: bytes, data: dict, timeout: tuple, **kwargs) -> Response
+            Sends a request and returns the response. Connection and timeout errors raise NetworkError.
+        pool_stats() -> dict
+            Returns the number of pools, requests sent, connections opened and connections reused.
+        close()
+            Closes every pooled connection.
+    """
+    def __init__(self, pool_size: int = 10, max_connections_per_host: int = 10, keep_alive: bool = True,
+                 pool_block: bool = False):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.exceptions import HTTPError
+
+        # Body reads bypass requests, so urllib3 errors raised while streaming are caught as well.
+        self._errors = (requests.ConnectionError, requests.Timeout, HTTPError)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=max_connections_per_host,
+                              pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+        try:
+            response = self.session.request(method=method, url=url, headers=headers, data=content or data,
+                                            timeout=timeout, stream=True, **kwargs)
+            raw = response.raw.read(decode_content=False)
+        except self._errors as error:
+            raise NetworkError(f"Network error: {error}") from error
+        response.raw.release_conn()
+        return Response.from_wire(response.status_code, response.headers, raw,
+                                  "HTTP/1.0" if response.raw.version == 10 else "HTTP/1.1")
+
+    def pool_stats(self):
+        stats = {"pools": 0, "requests": 0, "connections_opened": 0, "connections_reused": 0}
+        seen = set()
+        for adapter in self.session.adapters.values():
+            if id(adapter) in seen or not hasattr(adapter, 'poolmanager'):
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats["pools"] += 1
+                stats["requests"] += pool.num_requests
+                stats["connections_opened"] += pool.num_connections
+        stats["connections_reused"] = max(stats["requests"] - stats["connections_opened"], 0)
+        return stats
+
+    def close(self):
+        self.session.close()
+
+
+class _HttpxStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_peak = 0
+        self.http_versions = {}
+
+    def record(self, response, connections_open):
+        with self._lock:
+            self.requests += 1
+            self.connections_peak = max(self.connections_peak, connections_open)
+            version = response.http_version
+            self.http_versions[version] = self.http_versions.get(version, 0) + 1
+
+    def as_dict(self, connections_open):
+        with self._lock:
+            return {"requests": self.requests, "connections_open": connections_open,
+                    "connections_peak": max(self.connections_peak, connections_open),
+                    "http_versions": dict(self.http_versions)}
+
+
+class _HttpxTransportBase(Transport):
+    def __init__(self, max_connections_per_host: int = 10, keep_alive: bool = True, http2: bool = False):
+        import httpx
+
+        self._httpx = httpx
+        self.http2 = http2 and _http2_available()
+        self.limits = httpx.Limits(max_connections=max_connections_per_host,
+                                   max_keepalive_connections=max_connections_per_host if keep_alive else 0)
+        self._stats = _HttpxStats()
+
+    def _timeout(self, timeout):
+        if timeout is None or isinstance(timeout, self._httpx.Timeout):
+            return timeout
+        if isinstance(timeout, (tuple, list)):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def _connections_open(self):
+        pool = getattr(getattr(self.session, '_transport', None), '_pool', None)
+        return len(getattr(pool, 'connections', []))
+
+    def pool_stats(self):
+        return self._stats.as_dict(self._connections_open())
+
+
+class HttpxTransport(_HttpxTransportBase):
+    """
+        Sends requests with a pooled httpx.Client, optionally over HTTP/2.
+
+        With `http2=True` concurrent requests are multiplexed over a few connections. HTTP/2 is negotiated with
+        the server, so hosts that only speak HTTP/1.1 (and plain `http://` URLs) keep working over HTTP/1.1, and when
+        the `h2` package is missing the transport warns and uses HTTP/1.1.
+
+        Attributes
+        ----------
+        session : httpx.Client
+            The pooled client.
+        http2 : bool
+            Whether HTTP/2 is enabled.
+
+        Methods
+        -------
+        send(method: str, url: str, headers: dict, content: bytes, data: dict, timeout: tuple, **kwargs) -> Response
+            Sends a request and returns the response. Transport errors raise NetworkError.
+        pool_stats() -> dict
+            Returns the requests sent, connections open and the HTTP versions responses used.
+        close()
+            Closes every pooled connection.
+    """
+    def __init__(self, max_connections_per_host: int = 10, keep_alive: bool = True, http2: bool = False):
+        super().__init__(max_connections_per_host, keep_alive, http2)
+        self.session = self._httpx.Client(limits=self.limits, http2=self.http2)
+
+    def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+        request = self.session.build_request(method, url, headers=headers, content=content, data=data,
+                                             timeout=self._timeout(timeout), **kwargs)
+        try:
+            response = self.session.send(request, stream=True)
+            try:
+                raw = b"".join(response.iter_raw())
+            finally:
+                response.close()
+        except self._httpx.TransportError as error:
+            raise NetworkError(f"Network error: {error}") from error
+        self._stats.record(response, self._connections_open())
+        return Response.from_wire(response.status_code, response.headers.items(), raw, response.http_version)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpxTransport(_HttpxTransportBase):
+    """
+        asyncio counterpart of HttpxTransport, built on a pooled httpx.AsyncClient.
+
+        Methods
+        -------
+        send(method: str, url: str, headers: dict, content: bytes, data: dict, timeout: tuple, **kwargs) -> Response
+            Coroutine that sends a request and returns the response. Transport errors raise NetworkError.
+        pool_stats() -> dict
+            Returns the requests sent, connections open and the HTTP versions responses used.
+        close()
+            Coroutine that closes every pooled connection.
+    """
+    def __init__(self, max_connections_per_host: int = 10, keep_alive: bool = True, http2: bool = False):
+        super().__init__(max_connections_per_host, keep_alive, http2)
+        self.session = self._httpx.AsyncClient(limits=self.limits, http2=self.http2)
+
+    async def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+        request = self.session.build_request(method, url, headers=headers, content=content, data=data,
+                                             timeout=self._timeout(timeout), **kwargs)
+        try:
+            response = await self.session.send(request, stream=True)
+            try:
+                raw = b"".join([chunk async for chunk in response.aiter_raw()])
+            finally:
+                await response.aclose()
+        except self._httpx.TransportError as error:
+            raise NetworkError(f"Network error: {error}") from error
+        self._stats.record(response, self._connections_open())
+        return Response.from_wire(response.status_code, response.headers.items(), raw, response.http_version)
+
+    async def close(self):
+        await self.session.aclose()
+
+
+class MemoryTransport(Transport):
+    """
+        Answers requests from canned responses without touching the network.
+
+        Routes are matched on the method and the end of the URL path, so they work with any base URL. Segments
+        written as `{id}` match any value, and the most recently added matching route wins. Unmatched requests get
+        a 404 response. A login route is added by default, so clients can authenticate.
+
+        Example
+        -------
+        transport = MemoryTransport()
+        transport.add("GET", "users/{id}", json={"id": "user-1"})
+        client = Client("SANDBOX", "email", "password", transport=transport)
+
+        Attributes
+        ----------
+        requests : deque
+            The last `history` requests, as `(method, url, headers, content)` tuples.
+        calls : int
+            The number of requests answered.
+
+        Methods
+        -------
+        add(method: str, path: str, status_code: int = 200, json=None, content: bytes = b"", headers: dict = None,
+            handler=None)
+            Adds a route answering with `json`, with the raw `content`, or with the Response returned by
+            `handler(method, url, headers, content)`.
+        send(method: str, url: str, headers: dict, content: bytes, data: dict, timeout: tuple, **kwargs) -> Response
+            Returns the response of the matching route.
+    """
+    def __init__(self, history: int = 100):
+        self.requests = deque(maxlen=history)
+        self.calls = 0
+        self._routes = []
+        self._lock = threading.Lock()
+        self.add("POST", "auth/login", json={"accessToken": "memory-token", "expiresIn": 3600})
+
+    def add(self, method, path, status_code=200, json=None, content=b"", headers=None, handler=None):
+        if json is not None:
+            content = _json_dumps(json)
+            headers = {"Content-Type": "application/json", **(headers or {})}
+        response = Response(status_code, headers or {}, content)
+        segments = tuple(path.split("?", 1)[0].strip("/").split("/"))
+        self._routes.append((method.upper(), segments, response, handler))
+
+    def _match(self, method, url):
+        segments = urlsplit(url).path.strip("/").split("/")
+        for route_method, route_segments, response, handler in reversed(self._routes):
+            if route_method != method.upper() or len(route_segments) > len(segments):
+                continue
+            tail = segments[len(segments) - len(route_segments):]
+            if all(expected == "{id}" or expected == actual for expected, actual in zip(route_segments, tail)):
+                return response, handler
+        return None, None
+
+    def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.requests.append((method, url, headers, content if content is not None else data))
+        response, handler = self._match(method, url)
+        if handler is not None:
+            return handler(method, url, headers, content)
+        if response is None:
+            return Response(404, {"Content-Type": "application/json"}, b'{"message":"Not Found"}')
+        return response
+
+    def pool_stats(self):
+        return {"requests": self.calls}
+
+
+class AsyncMemoryTransport(MemoryTransport):
+    """
+        asyncio counterpart of MemoryTransport, for AsyncClient and AsyncApiRequests.
+    """
+    async def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+        return super().send(method, url, headers, content, data, timeout, **kwargs)
+
+    async def close(self):
+        pass
+
+
+def _json_dumps(data):
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
@@ -38,6 +38,7 @@ class CreateRampResponse(TypedDict, total=False):
     cashInMethod: CashInMethod
     cashOutMethod: CashOutMethod
     accountId: str
+    status: Optional[str]
     isPrefunded: Optional[bool]
     paymentInfo: Any
     details: str
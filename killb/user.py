@@ -1,6 +1,7 @@
 from killb.api_requests import ApiRequests
 from killb.types.user import UserCreateData, UserCreateResponse, PersonData, CompanyData, GetUserByQuery
-from typing import Union
+from typing import Union, Iterator, AsyncIterator
+from killb.pagination import iter_pages, aiter_pages
 from urllib.parse import urlencode
 
 
@@ -21,6 +22,9 @@ class User:
             Updates an existing user.
         get_by_query(query_params: dict) -> dict:
             Retrieves users based on query parameters.
+        iter_by_query(query_params: dict, prefetch: bool = True, workers: int = 1,
+                      ordered: bool = True) -> Iterator[dict]:
+            Yields every user matching the query parameters, across all pages.
     """
     def __init__(self, api_requests: ApiRequests):
         """
@@ -171,3 +175,48 @@ class User:
         """
         query_string = urlencode(data)
         return self.api_requests.request(method="GET", endpoint=f"users?{query_string}")
+
+    def iter_by_query(self, data: GetUserByQuery, prefetch: bool = True, workers: int = 1,
+                      ordered: bool = True) -> Iterator[dict]:
+        """
+            Yields every user matching the query parameters, one at a time, across all pages.
+
+            Parameters:
+            ----------
+            query_params : dict
+                The query parameters. `limit` sets the page size and `page` the first page (default 1).
+            prefetch : bool, optional
+                Whether the next page is fetched in the background while the current one is consumed (default True).
+            workers : int, optional
+                For bulk listings, the number of pages fetched concurrently once `totalPage` is known from the
+                first page (default 1). Requests still go through the client's rate limiter, if any.
+            ordered : bool, optional
+                Whether records are yielded in page order when `workers` is above 1 (default True).
+
+            Returns:
+            -------
+            Iterator[dict]
+                The matching users.
+        """
+        return iter_pages(self.get_by_query, data, "users", prefetch, workers, ordered)
+
+
+class AsyncUser(User):
+    """
+        Async counterpart of User, built on an AsyncApiRequests instance.
+
+        Every method is a coroutine that takes the same parameters and returns the same data as its User equivalent,
+        except `iter_by_query`, which returns an async iterator.
+    """
+    async def create(self, data: UserCreateData) -> UserCreateResponse:
+        return await super().create(data)
+
+    async def update(self, data: Union[PersonData, CompanyData], user_id: str) -> UserCreateResponse:
+        return await super().update(data, user_id)
+
+    async def get_by_query(self, data: GetUserByQuery):
+        return await super().get_by_query(data)
+
+    def iter_by_query(self, data: GetUserByQuery, prefetch: bool = True, workers: int = 1,
+                      ordered: bool = True) -> AsyncIterator[dict]:
+        return aiter_pages(self.get_by_query, data, "users", prefetch, workers, ordered)
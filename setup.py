@@ -5,6 +5,8 @@ setup(
     version="1.0.4",
     packages=find_packages(),
     requires=['requests'],
+    extras_require={'async': ['httpx'], 'http2': ['httpx[http2]'], 'brotli': ['brotli'], 'orjson': ['orjson'],
+                    'parquet': ['pyarrow']},
     author="Kill-B",
     description="SDK for KillB API V2",
     long_description=open('./README.md').read(),
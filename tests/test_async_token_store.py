@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+from killb.async_api_requests import AsyncApiRequests
+from killb.token_store import MemoryTokenStore
+from killb.transport import AsyncMemoryTransport
+
+
+class _SlowLock:
+    def __init__(self):
+        self.release_gate = threading.Event()
+        self.acquired = threading.Event()
+        self.held = False
+
+    def __enter__(self):
+        self.release_gate.wait(5)
+        self.held = True
+        self.acquired.set()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.held = False
+
+
+class _SlowStore(MemoryTokenStore):
+    def __init__(self):
+        super().__init__()
+        self.slow_lock = _SlowLock()
+
+    def lock(self, key):
+        return self.slow_lock
+
+
+def test_cancelled_login_releases_the_store_lock():
+    store = _SlowStore()
+    api_requests = AsyncApiRequests("SANDBOX", "email", "password", token_store=store,
+                                    transport=AsyncMemoryTransport())
+
+    async def scenario():
+        login = asyncio.ensure_future(api_requests._login())
+        await asyncio.sleep(0.05)
+        login.cancel()
+        try:
+            await login
+        except asyncio.CancelledError:
+            pass
+        # The worker thread only gets the lock after the task was cancelled.
+        store.slow_lock.release_gate.set()
+        await asyncio.to_thread(store.slow_lock.acquired.wait, 5)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert store.slow_lock.acquired.is_set()
+    assert not store.slow_lock.held
+
+
+def test_login_adopts_and_saves_tokens_under_the_lock():
+    store = MemoryTokenStore()
+    api_requests = AsyncApiRequests("SANDBOX", "email", "password", token_store=store,
+                                    transport=AsyncMemoryTransport())
+    asyncio.run(api_requests._login())
+    assert api_requests.access_token == "memory-token"
+    assert store.load(api_requests.token_store_key())["accessToken"] == "memory-token"
+    assert not store.lock(api_requests.token_store_key()).locked()
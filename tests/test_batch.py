@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import pytest
+
+from killb.async_client import AsyncClient
+from killb.client import Client
+from killb.exceptions import KillBApiError
+from killb.transport import AsyncMemoryTransport, MemoryTransport
+
+
+def _routes(transport):
+    transport.add("GET", "accounts/{id}", json={"id": "account-1"})
+    transport.add("GET", "ramps", json={"totalPage": 1, "ramps": [{"id": "ramp-1"}]})
+    return transport
+
+
+def test_a_failed_call_does_not_fail_the_batch():
+    with Client("SANDBOX", "email", "password", lazy=True, transport=_routes(MemoryTransport()),
+                base_url="https://api.test/v2") as client:
+        results = client.batch([
+            (client.Account.get_by_id, "account-1"),
+            (client.Savings.get_balance, "savings-1"),  # not routed: 404
+            lambda: client.Ramps.get_by_query({"id": "ramp-1"}),
+        ])
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[0].unwrap() == {"id": "account-1"}
+    assert results[2].result["ramps"] == [{"id": "ramp-1"}]
+    assert isinstance(results[1].error, KillBApiError)
+    with pytest.raises(KillBApiError):
+        results[1].unwrap()
+
+
+def test_map_is_bounded_by_batch_workers():
+    lock = threading.Lock()
+    running = peak = 0
+    gate = threading.Event()
+
+    def call(value):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        gate.wait(0.02)
+        with lock:
+            running -= 1
+        if value == 3:
+            raise ValueError(value)
+        return value * 2
+
+    with Client("SANDBOX", "email", "password", lazy=True, transport=MemoryTransport(), batch_workers=2) as client:
+        results = client.map(call, range(6))
+
+    assert peak <= 2
+    assert [result.result for result in results] == [0, 2, 4, None, 8, 10]
+    assert isinstance(results[3].error, ValueError)
+
+
+def test_async_batch_keeps_order_and_errors():
+    running = peak = 0
+
+    async def call(value):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (5 - value))
+        running -= 1
+        if value == 1:
+            raise ValueError(value)
+        return value
+
+    async def scenario():
+        client = AsyncClient("SANDBOX", "email", "password", transport=_routes(AsyncMemoryTransport()),
+                             base_url="https://api.test/v2")
+        try:
+            results = await client.map(call, range(5), max_concurrency=2)
+            fetched = await client.batch([(client.Account.get_by_id, "account-1"),
+                                          (client.Savings.get_balance, "savings-1")])
+        finally:
+            await client.close()
+        return results, fetched
+
+    results, fetched = asyncio.run(scenario())
+
+    assert peak == 2
+    assert [result.result for result in results] == [0, None, 2, 3, 4]
+    assert isinstance(results[1].error, ValueError)
+    assert fetched[0].unwrap() == {"id": "account-1"}
+    assert isinstance(fetched[1].error, KillBApiError)
+
+
+def test_nested_batches_do_not_deadlock():
+    with Client("SANDBOX", "email", "password", lazy=True, transport=MemoryTransport(), batch_workers=2) as client:
+        def nested(value):
+            return [result.unwrap() for result in client.map(lambda item: item * value, range(3))]
+
+        done = []
+        thread = threading.Thread(target=lambda: done.append(client.map(nested, [1, 2])), daemon=True)
+        thread.start()
+        thread.join(5)
+
+    assert done, "nested batch deadlocked"
+    assert [result.unwrap() for result in done[0]] == [[0, 1, 2], [0, 2, 4]]
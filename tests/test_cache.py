@@ -0,0 +1,101 @@
+import json
+import time
+
+from killb.account import Account
+from killb.api_requests import ApiRequests
+from killb.cache import ResponseCache
+from killb.transport import MemoryTransport, Response
+
+
+def _json(value):
+    return Response(200, {"Content-Type": "application/json"}, json.dumps(value).encode())
+
+
+def _account_resource():
+    accounts = {"ac1": {"id": "ac1", "userId": "u1", "status": "PENDING"},
+                "ac2": {"id": "ac2", "userId": "u2", "status": "ACTIVE"}}
+
+    def _accounts(method, url, headers, content):
+        key = url.rsplit("/", 1)[1]
+        if method == "PATCH":
+            accounts[key].update(json.loads(content))
+            return _json(accounts[key])
+        if key in accounts:
+            return _json(accounts[key])
+        return _json([account for account in accounts.values() if account["userId"] == key])
+
+    transport = MemoryTransport()
+    transport.add("GET", "accounts/{id}", handler=_accounts)
+    transport.add("PATCH", "accounts/{id}", handler=_accounts)
+    cache = ResponseCache()
+    api_requests = ApiRequests("SANDBOX", "email", "password", transport=transport,
+                               base_url="https://api.test/v2", response_cache=cache)
+    return Account(api_requests), cache, transport
+
+
+def test_update_invalidates_the_owner_lookup():
+    account, cache, transport = _account_resource()
+    assert account.get_by_user("u1")[0]["status"] == "PENDING"
+    assert account.get_by_user("u2")[0]["status"] == "ACTIVE"
+    assert account.get_by_id("ac1")["status"] == "PENDING"
+
+    account.update("ac1", {"status": "ACTIVE"})
+
+    assert account.get_by_user("u1")[0]["status"] == "ACTIVE"
+    assert account.get_by_id("ac1")["status"] == "ACTIVE"
+    assert cache.stats()["invalidations"] == 2
+    # The other user's accounts do not mention ac1 and stay cached.
+    calls = transport.calls
+    account.get_by_user("u2")
+    assert transport.calls == calls
+
+
+def test_cached_reads_skip_the_network():
+    account, cache, transport = _account_resource()
+    account.get_by_id("ac2")
+    calls = transport.calls
+    account.get_by_id("ac2")
+    assert transport.calls == calls
+    assert cache.stats()["hits"] == 1
+
+
+def _revalidating_resource(evict=False):
+    cache = ResponseCache({"accounts/{id}": 0.05})
+    conditional = []
+
+    def _accounts(method, url, headers, content):
+        conditional.append(headers.get("If-None-Match"))
+        if headers.get("If-None-Match") == '"v1"':
+            if evict:
+                cache.clear()
+            return Response(304, {"ETag": '"v1"'}, b"")
+        return Response(200, {"Content-Type": "application/json", "ETag": '"v1"'}, b'{"id":"ac1"}')
+
+    transport = MemoryTransport()
+    transport.add("GET", "accounts/{id}", handler=_accounts)
+    api_requests = ApiRequests("SANDBOX", "email", "password", transport=transport,
+                               base_url="https://api.test/v2", response_cache=cache)
+    return Account(api_requests), cache, conditional
+
+
+def test_expired_entries_are_revalidated():
+    account, cache, conditional = _revalidating_resource()
+    first = account.get_by_id("ac1")
+    time.sleep(0.1)
+
+    assert account.get_by_id("ac1") is first
+    assert conditional == [None, '"v1"']
+    assert cache.stats()["revalidations"] == 1
+    # The 304 renewed the entry.
+    assert account.get_by_id("ac1") is first
+    assert len(conditional) == 2
+
+
+def test_an_entry_evicted_before_the_304_is_fetched_again():
+    account, cache, conditional = _revalidating_resource(evict=True)
+    account.get_by_id("ac1")
+    time.sleep(0.1)
+
+    assert account.get_by_id("ac1") == {"id": "ac1"}
+    assert conditional == [None, '"v1"', None]
+    assert cache.stats()["revalidations"] == 0
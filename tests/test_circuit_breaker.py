@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from killb.api_requests import ApiRequests
+from killb.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker
+from killb.exceptions import DeadlineExceededError
+from killb.rate_limit import RateLimiter
+from killb.transport import MemoryTransport, Response
+
+
+def _client(handler, **kwargs):
+    transport = MemoryTransport()
+    transport.add("GET", "accounts/{id}", handler=handler)
+    api_requests = ApiRequests("SANDBOX", "email", "password", transport=transport, base_url="https://api.test/v2",
+                               **kwargs)
+    api_requests.refresh_token()
+    return api_requests
+
+
+def _ok(method, url, headers, content):
+    return Response(200, {"Content-Type": "application/json"}, b'{"id":"account-1"}')
+
+
+def test_rate_limiter_waits_do_not_count_as_slow_calls():
+    breaker = CircuitBreaker(slow_call_duration=0.2, slow_call_rate_threshold=0.5, minimum_calls=4)
+    api_requests = _client(_ok, circuit_breaker=breaker, rate_limiter=RateLimiter(rate=4, burst=1))
+    threads = [threading.Thread(target=api_requests.request, args=("GET", "accounts/account-1")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert breaker.state("accounts/account-1") == CLOSED
+    assert breaker.stats()["accounts/{id}"]["slow_call_rate"] == 0
+
+
+def test_deadline_errors_before_the_network_leave_trial_calls_alone():
+    failing = [True]
+
+    def handler(method, url, headers, content):
+        if failing[0]:
+            return Response(503, {}, b"unavailable")
+        return _ok(method, url, headers, content)
+
+    breaker = CircuitBreaker(minimum_calls=2, open_duration=0.05, half_open_max_calls=1)
+    api_requests = _client(handler, circuit_breaker=breaker, rate_limiter=RateLimiter(rate=5, burst=1))
+    for _ in range(2):
+        with pytest.raises(Exception):
+            api_requests.request("GET", "accounts/account-1")
+    failing[0] = False
+    time.sleep(0.1)
+    assert breaker.state("accounts/account-1") == HALF_OPEN
+
+    # The rate limiter wait outlasts the deadline: the call fails before the network.
+    with pytest.raises(DeadlineExceededError):
+        api_requests.request("GET", "accounts/account-1", deadline=0.05)
+    assert breaker.state("accounts/account-1") == HALF_OPEN
+
+    time.sleep(0.5)
+    assert api_requests.request("GET", "accounts/account-1") == {"id": "account-1"}
+    assert breaker.state("accounts/account-1") == CLOSED
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from killb.api_requests import ApiRequests
+from killb.async_api_requests import AsyncApiRequests
+from killb.exceptions import DeadlineExceededError, NetworkError
+from killb.transport import AsyncMemoryTransport, MemoryTransport, Response
+
+
+def _slow(method, url, headers, content):
+    time.sleep(0.3)
+    return Response(200, {"Content-Type": "application/json"}, b'{"id":"account-1"}')
+
+
+def test_a_short_leader_deadline_does_not_fail_the_followers():
+    transport = MemoryTransport()
+    transport.add("GET", "accounts/{id}", handler=_slow)
+    api_requests = ApiRequests("SANDBOX", "email", "password", transport=transport, base_url="https://api.test/v2",
+                               coalesce_reads=True)
+    api_requests.refresh_token()
+    outcomes = {}
+
+    def call(name, deadline):
+        try:
+            outcomes[name] = api_requests.request("GET", "accounts/account-1", deadline=deadline)
+        except DeadlineExceededError as error:
+            outcomes[name] = error
+
+    leader = threading.Thread(target=call, args=("leader", 0.1))
+    follower = threading.Thread(target=call, args=("follower", 5))
+    leader.start()
+    time.sleep(0.05)
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert isinstance(outcomes["leader"], DeadlineExceededError)
+    assert outcomes["follower"] == {"id": "account-1"}
+    assert transport.calls == 2  # the login and one shared GET
+
+
+def test_async_shared_call_ignores_the_leader_deadline():
+    class _Transport(AsyncMemoryTransport):
+        async def send(self, method, url, headers=None, content=None, data=None, timeout=None, **kwargs):
+            if url.endswith("accounts/account-1"):
+                # Like a socket, honour the read timeout, which a deadline shortens.
+                read = timeout[1] if isinstance(timeout, tuple) else timeout
+                await asyncio.sleep(min(0.3, read or 0.3))
+                if read is not None and read < 0.3:
+                    raise NetworkError("Network error: read timed out")
+            return await super().send(method, url, headers, content, data, timeout, **kwargs)
+
+    transport = _Transport()
+    transport.add("GET", "accounts/{id}", json={"id": "account-1"})
+
+    async def scenario():
+        api_requests = AsyncApiRequests("SANDBOX", "email", "password", transport=transport,
+                                        base_url="https://api.test/v2", coalesce_reads=True)
+        await api_requests.refresh_token()
+        leader = asyncio.ensure_future(api_requests.request("GET", "accounts/account-1", deadline=0.1))
+        await asyncio.sleep(0.05)
+        follower = await api_requests.request("GET", "accounts/account-1", deadline=5)
+        with pytest.raises(DeadlineExceededError):
+            await leader
+        await api_requests.close()
+        return follower
+
+    assert asyncio.run(scenario()) == {"id": "account-1"}
+    assert transport.calls == 2
@@ -0,0 +1,101 @@
+import csv
+import os
+
+import pytest
+
+import killb.export
+from killb.export import IncrementalExport
+
+
+def _listing(records):
+    def fetch(query):
+        return {"totalPage": 1, "transactions": list(records)}
+    return fetch
+
+
+def _export(tmp_path, records, **kwargs):
+    return IncrementalExport(_listing(records), {"limit": 100}, "transactions", directory=str(tmp_path), lag=0,
+                             **kwargs)
+
+
+def _rows(path):
+    with open(path, newline="") as part_file:
+        return list(csv.DictReader(part_file))
+
+
+def _records(count, start=1_700_000_000):
+    return [{"id": f"t{index}", "amount": index, "updatedAt": start + index} for index in range(count)]
+
+
+def test_a_crash_before_the_checkpoint_is_redone(tmp_path):
+    records = _records(3)
+    export = _export(tmp_path, records)
+
+    def failing(query):
+        yield records[0]
+        raise ConnectionError("listing failed")
+
+    export.fetch = lambda query: {"totalPage": 1, "transactions": failing(query)}
+    with pytest.raises(ConnectionError):
+        export.run()
+    assert export.cursor() is None
+
+    export.fetch = _listing(records)
+    summary = export.run()
+    assert summary["records"] == 3
+    assert [row["id"] for row in _rows(summary["part"])] == ["t0", "t1", "t2"]
+
+
+def test_a_crash_after_the_checkpoint_is_completed(tmp_path, monkeypatch):
+    export = _export(tmp_path, _records(3))
+    replace = os.replace
+
+    def crash_on_parts(source, target):
+        if target.endswith(".csv"):
+            raise OSError("crashed")
+        replace(source, target)
+
+    monkeypatch.setattr(killb.export.os, "replace", crash_on_parts)
+    with pytest.raises(OSError):
+        export.run()
+    monkeypatch.setattr(killb.export.os, "replace", replace)
+
+    summary = export.run()
+    assert summary["records"] == 0
+    part = os.path.join(str(tmp_path), "transactions-000001.csv")
+    assert [row["id"] for row in _rows(part)] == ["t0", "t1", "t2"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_a_late_field_starts_a_new_part(tmp_path):
+    records = _records(3)
+    records[2]["fee"] = 5
+    summary = _export(tmp_path, records, batch_size=2).run()
+
+    assert summary["records"] == 3
+    assert [os.path.basename(part) for part in summary["parts"]] == ["transactions-000001.csv",
+                                                                     "transactions-000001-2.csv"]
+    assert "fee" not in _rows(summary["parts"][0])[0]
+    assert _rows(summary["parts"][1]) == [{"id": "t2", "amount": "2", "updatedAt": "1700000002", "fee": "5"}]
+
+
+def test_explicit_columns_leave_other_fields_out(tmp_path):
+    records = _records(2)
+    records[1]["fee"] = 5
+    summary = _export(tmp_path, records, columns=["id", "amount"], batch_size=1).run()
+    assert summary["parts"] == [summary["part"]]
+    assert _rows(summary["part"]) == [{"id": "t0", "amount": "0"}, {"id": "t1", "amount": "1"}]
+
+
+def test_parquet_accepts_null_and_mixed_columns(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    records = _records(4)
+    records[0]["fee"] = records[1]["fee"] = None
+    records[2]["fee"], records[3]["fee"] = 1, 1.5
+    summary = _export(tmp_path, records, format="parquet", batch_size=2).run()
+
+    table = pyarrow.parquet.read_table(summary["part"])
+    assert table.column("fee").to_pylist() == [None, None, "1", "1.5"]
+    assert table.column("amount").to_pylist() == ["0", "1", "2", "3"]
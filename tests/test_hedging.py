@@ -0,0 +1,121 @@
+import threading
+import time
+
+from killb.api_requests import ApiRequests
+from killb.hedging import HedgePolicy
+from killb.transport import MemoryTransport, Response
+
+
+def _client(handler, **kwargs):
+    transport = MemoryTransport()
+    transport.add("GET", "accounts/{id}", handler=handler)
+    api_requests = ApiRequests("SANDBOX", "email", "password", transport=transport, base_url="https://api.test/v2",
+                               **kwargs)
+    api_requests.refresh_token()
+    return api_requests
+
+
+def _ok(method, url, headers, content):
+    return Response(200, {"Content-Type": "application/json"}, b'{"id":"account-1"}')
+
+
+def _stats(policy):
+    return policy.stats()["accounts/{id}"]
+
+
+def test_concurrent_calls_are_not_queued_or_hedged():
+    def handler(method, url, headers, content):
+        time.sleep(0.04)
+        return _ok(method, url, headers, content)
+
+    # The delay leaves room for scheduling 80 threads on a single CPU; queued calls would take about 3 s.
+    # min_samples keeps that delay: the p95 of these calls is their own latency, which would hedge the slowest.
+    policy = HedgePolicy(initial_delay=0.5, min_samples=1000, budget=1, budget_burst=1000)
+    api_requests = _client(handler, hedge_policy=policy)
+
+    def caller():
+        for _ in range(2):
+            api_requests.request("GET", "accounts/account-1")
+
+    threads = [threading.Thread(target=caller) for _ in range(80)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    assert _stats(policy)["calls"] == 160
+    assert _stats(policy)["hedges_issued"] == 0
+    assert elapsed < 1
+
+
+def test_hedge_answers_for_a_stuck_attempt():
+    release = threading.Event()
+    first = threading.Event()
+
+    def handler(method, url, headers, content):
+        if not first.is_set():
+            first.set()
+            release.wait(2)
+        return _ok(method, url, headers, content)
+
+    policy = HedgePolicy(initial_delay=0.05, budget=1, budget_burst=10)
+    api_requests = _client(handler, hedge_policy=policy)
+    started = time.monotonic()
+    assert api_requests.request("GET", "accounts/account-1") == {"id": "account-1"}
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert elapsed < 1
+    assert _stats(policy)["hedges_issued"] == 1
+    assert _stats(policy)["hedges_won"] == 1
+
+
+def test_hedges_are_skipped_while_the_pool_is_busy():
+    release = threading.Event()
+
+    def handler(method, url, headers, content):
+        release.wait(2)
+        return _ok(method, url, headers, content)
+
+    policy = HedgePolicy(initial_delay=0.02, budget=1, budget_burst=100)
+    # One connection per host gives a hedge pool of two workers.
+    api_requests = _client(handler, hedge_policy=policy, max_connections_per_host=1)
+    threads = [threading.Thread(target=api_requests.request, args=("GET", "accounts/account-1"))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    issued = _stats(policy)["hedges_issued"] if "accounts/{id}" in policy.stats() else 0
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert issued <= 2
+    assert _stats(policy)["hedges_issued"] <= 2
+
+
+def test_attempt_threads_are_bounded():
+    release = threading.Event()
+
+    def handler(method, url, headers, content):
+        release.wait(2)
+        return _ok(method, url, headers, content)
+
+    policy = HedgePolicy(initial_delay=0.02, budget=1, budget_burst=1000)
+    api_requests = _client(handler, hedge_policy=policy, max_connections_per_host=4)
+    before = threading.active_count()
+    threads = [threading.Thread(target=api_requests.request, args=("GET", "accounts/account-1"))
+               for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    # The callers, plus at most 4 first attempts and 4 hedges on the pools.
+    alive = threading.active_count() - before
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert alive <= 50 + 4 + 4
+    assert _stats(policy)["calls"] == 50
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+# Cumulative microseconds allowed for `import killb.client`, measured with -X importtime. The import takes about
+# 25 ms on a laptop; the budget leaves room for slow CI machines while still catching an eager heavy import.
+IMPORT_BUDGET_US = 150_000
+
+HEAVY_MODULES = ("httpx", "sqlite3", "pyarrow", "concurrent.futures", "requests", "orjson", "brotli")
+LAZY_RESOURCES = ("killb.account", "killb.user", "killb.quotations", "killb.savings", "killb.ramp", "killb.types")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_times():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import killb.client"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_client_import_skips_heavy_and_lazy_modules():
+    imported = _import_times()
+    assert "killb.client" in imported
+    assert [name for name in imported if name.startswith(HEAVY_MODULES)] == []
+    assert [name for name in imported if name.startswith(LAZY_RESOURCES)] == []
+
+
+def test_client_import_stays_within_budget():
+    # The best of a few runs, so that one slow run on a busy machine does not fail the suite.
+    best = min(_import_times()["killb.client"] for _ in range(3))
+    assert best < IMPORT_BUDGET_US, f"import killb.client took {best / 1000:.1f} ms"
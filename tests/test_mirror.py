@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+
+from killb.api_requests import ApiRequests
+from killb.async_client import AsyncClient
+from killb.mirror import LocalMirror
+from killb.transport import AsyncMemoryTransport, MemoryTransport
+
+RAMP = {"id": "ramp-1", "userId": "user-1", "status": "COMPLETED", "updatedAt": "2026-01-02T00:00:00Z"}
+
+
+def _api_requests(mirror):
+    transport = MemoryTransport()
+    transport.add("GET", "ramps", json={"totalPage": 1, "ramps": [RAMP]})
+    return ApiRequests("SANDBOX", "email", "password", transport=transport, base_url="https://api.test/v2",
+                       mirror=mirror)
+
+
+def test_responses_are_stored_off_the_request_path():
+    mirror = LocalMirror()
+    api_requests = _api_requests(mirror)
+    api_requests.refresh_token()
+
+    # A slow database: the writer cannot get the connection while the lock is held.
+    with mirror._lock:
+        started = time.monotonic()
+        api_requests.request("GET", "ramps?status=COMPLETED")
+        assert time.monotonic() - started < 0.5
+    assert mirror.find("ramps", userId="user-1", status="COMPLETED") == [RAMP]
+    mirror.close()
+
+
+def test_storage_errors_are_counted_without_failing_the_call():
+    mirror = LocalMirror()
+    mirror._connection.execute("DROP TABLE ramps")
+    api_requests = _api_requests(mirror)
+
+    assert api_requests.request("GET", "ramps")["ramps"] == [RAMP]
+    mirror.flush()
+    assert mirror.errors == 1
+    mirror.close()
+
+
+def test_an_older_version_does_not_replace_a_newer_one():
+    mirror = LocalMirror()
+    mirror.upsert("ramps", [{**RAMP, "status": "REFUNDED", "updatedAt": "2026-01-03T00:00:00Z"}])
+    mirror.observe("GET", "ramps", {"ramps": [RAMP]})
+    assert mirror.get("ramps", "ramp-1")["status"] == "REFUNDED"
+    mirror.close()
+
+
+def test_close_stores_the_queued_responses(tmp_path):
+    path = str(tmp_path / "mirror.db")
+    mirror = LocalMirror(path)
+    mirror.observe("GET", "ramps", {"ramps": [{**RAMP, "id": f"ramp-{index}"} for index in range(50)]})
+    mirror.close()
+
+    with LocalMirror(path) as reopened:
+        assert reopened.count("ramps") == 50
+
+
+def test_async_client_feeds_the_mirror_but_cannot_sync_it():
+    mirror = LocalMirror()
+    transport = AsyncMemoryTransport()
+    transport.add("GET", "ramps", json={"totalPage": 1, "ramps": [RAMP]})
+
+    async def scenario():
+        client = AsyncClient("SANDBOX", "email", "password", transport=transport, base_url="https://api.test/v2",
+                             mirror=mirror)
+        try:
+            await client.Ramps.get_by_query({"status": "COMPLETED"})
+        finally:
+            await client.close()
+        return client
+
+    client = asyncio.run(scenario())
+    assert mirror.get("ramps", "ramp-1") == RAMP
+    with pytest.raises(TypeError):
+        mirror.sync(client)
+    mirror.close()
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from killb.quotation_pool import QuotationPool
+
+CORRIDOR = {"fromCurrency": "MXN", "toCurrency": "USDC", "amount": 1000, "cashInMethod": "SPEI",
+            "cashOutMethod": "POLYGON"}
+
+
+class _Quotation:
+    """
+        Creates quotations that expire `lifetime` seconds after creation, or without `expiresAt` when it is None.
+    """
+    def __init__(self, lifetime):
+        self.lifetime = lifetime
+        self.created = 0
+
+    def create(self, data):
+        self.created += 1
+        quotation = {"id": f"quotation-{self.created}"}
+        if self.lifetime is not None:
+            quotation["expiresAt"] = time.time() + self.lifetime
+        return quotation
+
+
+def _run(pool, seconds):
+    with pytest.warns(RuntimeWarning):
+        with pool:
+            time.sleep(seconds)
+
+
+def test_short_lived_quotations_are_pooled_with_a_smaller_margin():
+    quotation = _Quotation(lifetime=8)
+    pool = QuotationPool(quotation, [CORRIDOR], retry_interval=0.05)
+    _run(pool, 0.3)
+
+    assert quotation.created == 1
+    assert pool.available(CORRIDOR) == 1
+    assert pool.stats()["errors"] == 1
+
+
+def test_quotations_without_expiry_are_not_created_over_and_over():
+    quotation = _Quotation(lifetime=None)
+    pool = QuotationPool(quotation, [CORRIDOR], retry_interval=0.05)
+    _run(pool, 0.3)
+
+    assert quotation.created == 1
+    assert pool.stats()["errors"] == 1
+    assert pool.take(CORRIDOR)["id"] == "quotation-2"
+    assert pool.stats()["on_demand"] == 1
+
+
+def test_long_lived_quotations_keep_the_full_margin():
+    quotation = _Quotation(lifetime=60)
+    with QuotationPool(quotation, [CORRIDOR], size=2, retry_interval=0.05) as pool:
+        time.sleep(0.2)
+        assert pool.take(CORRIDOR)["id"] == "quotation-1"
+        time.sleep(0.2)
+    assert quotation.created == 3
+    assert pool.stats()["errors"] == 0
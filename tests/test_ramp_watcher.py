@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from killb.ramp_watcher import AsyncRampWatcher, RampWatcher
+
+ACTIVE = ("CREATED", "CASH_IN_PROCESSING")
+TERMINAL = ("COMPLETED", "FAILED")
+
+
+class _Ramps:
+    """
+        Serves listings from `ramps` (id -> status) and fails the checks by id of the ramps in `broken`.
+    """
+    def __init__(self, ramps, broken=()):
+        self.ramps = ramps
+        self.broken = set(broken)
+
+    def get_by_query(self, query):
+        if "id" in query:
+            if query["id"] in self.broken:
+                raise ConnectionError(query["id"])
+            status = self.ramps.get(query["id"])
+            records = [{"id": query["id"], "status": status}] if status else []
+        else:
+            records = [{"id": ramp_id, "status": status} for ramp_id, status in self.ramps.items()
+                       if status == query["status"]]
+        return {"totalPage": 1, "ramps": records}
+
+
+class _AsyncRamps(_Ramps):
+    async def get_by_query(self, query):
+        await asyncio.sleep(0)
+        return super().get_by_query(query)
+
+
+def _statuses(transitions):
+    return {transition.ramp_id: transition.status for transition in transitions}
+
+
+def test_statuses_are_required():
+    with pytest.raises(TypeError):
+        RampWatcher(_Ramps({}))
+
+
+def test_a_failed_check_keeps_the_other_transitions_and_the_ramp():
+    ramps = _Ramps({"r1": "CREATED", "r2": "CREATED", "r3": "CREATED"})
+    delivered = []
+    watcher = RampWatcher(ramps, ACTIVE, TERMINAL, interval=0, on_change=delivered.append)
+    for ramp_id in ("r1", "r2", "r3"):
+        watcher.watch(ramp_id, "CREATED")
+
+    # r1 moves on, r2 finishes and r3 drops out of the listings while its check fails.
+    ramps.ramps.update({"r1": "CASH_IN_PROCESSING", "r2": "COMPLETED", "r3": "COMPLETED"})
+    ramps.broken.add("r3")
+    transitions = watcher.poll()
+
+    assert _statuses(transitions) == {"r1": "CASH_IN_PROCESSING", "r2": "COMPLETED"}
+    assert delivered == transitions
+    assert watcher.stats()["errors"] == 1
+    assert watcher.stats()["watched"] == 2  # r1 and r3
+
+    ramps.broken.clear()
+    assert _statuses(watcher.poll()) == {"r3": "COMPLETED"}
+    assert watcher.stats()["watched"] == 1
+
+
+def test_async_poll_survives_a_failed_check():
+    ramps = _AsyncRamps({"r1": "CREATED", "r2": "CREATED"})
+    queued = []
+
+    async def scenario():
+        watcher = AsyncRampWatcher(ramps, ACTIVE, TERMINAL, interval=0, on_change=queued.append)
+        watcher.watch("r1", "CREATED")
+        watcher.watch("r2", "CREATED")
+        ramps.ramps.update({"r1": "FAILED", "r2": "COMPLETED"})
+        ramps.broken.add("r2")
+        first = await watcher.poll()
+        ramps.broken.clear()
+        second = await watcher.poll()
+        return watcher, first, second
+
+    watcher, first, second = asyncio.run(scenario())
+
+    assert _statuses(first) == {"r1": "FAILED"}
+    assert _statuses(second) == {"r2": "COMPLETED"}
+    assert queued == first + second
+    assert watcher.stats()["errors"] == 1
+    assert watcher.stats()["watched"] == 0
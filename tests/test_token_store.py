@@ -0,0 +1,94 @@
+import os
+import stat
+
+import pytest
+
+from killb.token_store import FileTokenStore, TokenStore
+
+posix_only = pytest.mark.skipif(not hasattr(os, "getuid"), reason="requires POSIX ownership")
+
+
+def test_default_directory_is_private_to_the_user(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    store = FileTokenStore()
+    store.save("key", {"accessToken": "token", "expiresAt": 1})
+
+    assert store.directory == str(tmp_path / "cache" / "killb" / "tokens")
+    assert stat.S_IMODE(os.lstat(store.directory).st_mode) == 0o700
+    assert stat.S_IMODE(os.lstat(os.path.join(store.directory, "key.json")).st_mode) == 0o600
+    assert store.load("key") == {"accessToken": "token", "expiresAt": 1}
+    assert [name for name in os.listdir(store.directory) if name.endswith(".tmp")] == []
+
+
+@posix_only
+def test_open_directory_of_the_user_is_tightened(tmp_path):
+    directory = tmp_path / "tokens"
+    directory.mkdir(mode=0o777)
+    os.chmod(directory, 0o777)
+    FileTokenStore(str(directory))
+    assert stat.S_IMODE(os.lstat(directory).st_mode) == 0o700
+
+
+@posix_only
+@pytest.mark.skipif(not hasattr(os, "getuid") or os.getuid() != 0, reason="chown requires root")
+def test_directory_of_another_user_is_refused(tmp_path):
+    directory = tmp_path / "tokens"
+    directory.mkdir(mode=0o700)
+    os.chown(directory, 65534, 65534)
+    with pytest.raises(PermissionError):
+        FileTokenStore(str(directory))
+
+
+def test_symlinked_directory_is_refused(tmp_path):
+    (tmp_path / "real").mkdir(mode=0o700)
+    os.symlink(tmp_path / "real", tmp_path / "tokens")
+    with pytest.raises(PermissionError):
+        FileTokenStore(str(tmp_path / "tokens"))
+
+
+def test_planted_token_symlink_is_ignored(tmp_path):
+    store = FileTokenStore(str(tmp_path / "tokens"))
+    planted = tmp_path / "planted.json"
+    planted.write_text('{"accessToken": "attacker", "expiresAt": 9999999999}')
+    os.symlink(planted, os.path.join(store.directory, "key.json"))
+    assert store.load("key") is None
+
+
+@posix_only
+def test_token_writable_by_others_is_ignored(tmp_path):
+    store = FileTokenStore(str(tmp_path / "tokens"))
+    store.save("key", {"accessToken": "token", "expiresAt": 1})
+    os.chmod(os.path.join(store.directory, "key.json"), 0o666)
+    assert store.load("key") is None
+
+
+def test_lock_does_not_follow_symlinks(tmp_path):
+    store = FileTokenStore(str(tmp_path / "tokens"))
+    victim = tmp_path / "victim"
+    victim.write_text("keep")
+    os.symlink(victim, os.path.join(store.directory, "key.lock"))
+    with pytest.raises(OSError):
+        with store.lock("key"):
+            pass
+    assert victim.read_text() == "keep"
+
+
+def test_lock_can_be_taken_again(tmp_path):
+    store = FileTokenStore(str(tmp_path / "tokens"))
+    with store.lock("key"):
+        pass
+    with store.lock("key"):
+        store.save("key", {"accessToken": "token", "expiresAt": 1})
+    assert store.load("key")["accessToken"] == "token"
+
+
+def test_incomplete_store_cannot_be_created():
+    class NoLock(TokenStore):
+        def load(self, key):
+            return None
+
+        def save(self, key, token):
+            pass
+
+    with pytest.raises(TypeError):
+        NoLock()
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from killb.api_requests import ApiRequests
+from killb.cassette import CassetteTransport, RECORD
+from killb.exceptions import CassetteError, KillBApiError, NetworkError
+from killb.transport import HttpxTransport, MemoryTransport, Transport
+
+
+def _client(transport):
+    return ApiRequests("SANDBOX", "email", "secret-password", transport=transport, base_url="https://api.test/v2")
+
+
+def test_memory_transport_routes_and_unmatched_requests():
+    transport = MemoryTransport()
+    transport.add("GET", "accounts/{id}", json={"id": "account-1"})
+    api_requests = _client(transport)
+
+    assert api_requests.request("GET", "accounts/account-1") == {"id": "account-1"}
+    with pytest.raises(KillBApiError):
+        api_requests.request("GET", "users/user-1")
+    assert transport.calls == 3  # login, the account and the 404
+
+
+def test_cassette_replays_a_recording_without_secrets(tmp_path):
+    path = tmp_path / "cassette.json"
+    upstream = MemoryTransport()
+    upstream.add("GET", "ramps", json={"totalPage": 1, "ramps": [{"id": "ramp-1"}]})
+    recorder = CassetteTransport(str(path), mode=RECORD, transport=upstream)
+    _client(recorder).request("GET", "ramps?status=COMPLETED")
+    recorder.close()
+
+    text = path.read_text()
+    assert "secret-password" not in text and "memory-token" not in text
+    assert not [name for name in path.parent.iterdir() if name.name.endswith(".tmp")]
+
+    replay = CassetteTransport(str(path))
+    api_requests = _client(replay)
+    for _ in range(3):
+        # The last recording of a route is repeated once the recorded ones are used up.
+        assert api_requests.request("GET", "ramps?status=COMPLETED")["ramps"] == [{"id": "ramp-1"}]
+
+
+def test_cassette_refuses_unrecorded_and_missing_recordings(tmp_path):
+    path = tmp_path / "cassette.json"
+    with pytest.raises(CassetteError):
+        _client(CassetteTransport(str(path))).request("GET", "ramps")
+
+    recorder = CassetteTransport(str(path), mode=RECORD, transport=MemoryTransport())
+    _client(recorder).refresh_token()
+    recorder.save()
+    with pytest.raises(CassetteError):
+        _client(CassetteTransport(str(path))).request("GET", "ramps?status=CREATED")
+    assert json.loads(path.read_text())
+
+
+def test_transport_without_send_cannot_be_created():
+    class Closing(Transport):
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Closing()
+
+
+def test_corrupt_compressed_bodies_raise_network_errors():
+    httpx = pytest.importorskip("httpx")
+
+    def handler(request):
+        if request.url.path.endswith("/auth/login"):
+            return httpx.Response(200, stream=httpx.ByteStream(b'{"accessToken": "token", "expiresIn": 3600}'))
+        encoding = "gzip" if request.url.path.endswith("/accounts/account-1") else "zstd"
+        return httpx.Response(200, headers={"Content-Encoding": encoding},
+                              stream=httpx.ByteStream(b"not compressed"))
+
+    transport = HttpxTransport()
+    transport.session = httpx.Client(transport=httpx.MockTransport(handler))
+    api_requests = _client(transport)
+    for endpoint in ("accounts/account-1", "accounts/account-2"):
+        with pytest.raises(NetworkError) as raised:
+            api_requests.request("GET", endpoint)
+        assert isinstance(raised.value.__cause__, ValueError)
+    transport.close()